@@ -6,7 +6,7 @@ from sqlalchemy import pool
 from alembic import context
 
 from database_configs.db import Base
-from models.models import User, Task, Community, AlexaDevice, Room, Notification, CaregiverLog
+from models.models import User, Task, Community, AlexaDevice, Room, Notification, CaregiverLog, RefreshToken
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,43 @@
+"""Add composite indexes for the filtered task list
+
+Revision ID: 8b1e4d2f6a93
+Revises: 3f9c2b7d8e41
+Create Date: 2024-10-24 09:41:07.215530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b1e4d2f6a93'
+down_revision: Union[str, None] = '3f9c2b7d8e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY so Alexa task inserts aren't blocked while the indexes build (needs its own transaction)
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tasks_community_status_priority', 'tasks',
+            ['community_id', 'status', sa.text('priority_score DESC'), 'created_at', 'id'],
+            unique=False, postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_tasks_community_created_at', 'tasks', ['community_id', 'created_at', 'id'],
+            unique=False, postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_tasks_room_created_at', 'tasks', ['room_id', 'created_at'],
+            unique=False, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tasks_room_created_at', table_name='tasks', postgresql_concurrently=True)
+        op.drop_index('ix_tasks_community_created_at', table_name='tasks', postgresql_concurrently=True)
+        op.drop_index('ix_tasks_community_status_priority', table_name='tasks', postgresql_concurrently=True)
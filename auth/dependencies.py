@@ -5,13 +5,20 @@ from jose import JWTError, jwt
 from config import SECRET_KEY, ALGORITHM
 from models.models import User
 from sqlalchemy.ext.asyncio import AsyncSession
-from database_configs.db import get_db
+from database_configs.db import get_db, release
 from crud.crud_user import get_user_by_email
+from auth import principal_cache
+from auth.principal_cache import Principal
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/oauth2-login")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> Principal:
+    # A token that was already verified (and hasn't expired) skips both the JWT decode and the user query
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -25,6 +32,11 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
     except JWTError:
         raise credentials_exception
     user = await get_user_by_email(db, email=email)
-    if user is None:
+    principal = Principal.from_user(user) if user is not None else None
+    # Hand the connection back now; routes that write on this session check out a fresh one
+    await release(db)
+    if principal is None:
         raise credentials_exception
-    return user
\ No newline at end of file
+
+    principal_cache.put(token, principal, exp=payload.get("exp"))
+    return principal
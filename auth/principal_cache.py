@@ -0,0 +1,61 @@
+import time
+from typing import NamedTuple, Optional
+from cachetools import TLRUCache
+from config import PRINCIPAL_CACHE_MAX_SIZE, PRINCIPAL_CACHE_TTL_SECONDS
+
+
+# Snapshot of the authenticated user returned by get_current_user.
+# Routes only read these fields; a plain tuple (unlike an ORM User) stays valid across sessions.
+class Principal(NamedTuple):
+    id: int
+    email: str
+    name: Optional[str]
+    role: Optional[str]
+    community_id: Optional[int]
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(id=user.id, email=user.email, name=user.name, role=user.role, community_id=user.community_id)
+
+
+# token -> (principal, expires_at); every entry expires at the token's exp or after the max TTL, whichever is first
+_cache = TLRUCache(maxsize=PRINCIPAL_CACHE_MAX_SIZE, ttu=lambda _token, entry, _now: entry[1])
+
+# user id -> tokens cached for that user, so a user change can drop all of them
+_tokens_by_user: dict = {}
+
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def get(token: str) -> Optional[Principal]:
+    entry = _cache.get(token)
+    if entry is None:
+        _stats["misses"] += 1
+        return None
+    _stats["hits"] += 1
+    return entry[0]
+
+
+def put(token: str, principal: Principal, exp: Optional[float] = None):
+    """Caches a verified principal; `exp` is the token's expiry as a unix timestamp."""
+    ttl = PRINCIPAL_CACHE_TTL_SECONDS
+    if exp is not None:
+        ttl = min(ttl, exp - time.time())
+    if ttl <= 0:
+        return
+    _cache[token] = (principal, time.monotonic() + ttl)
+    # Forget tokens that already fell out of the cache while we're here
+    tokens = {cached for cached in _tokens_by_user.get(principal.id, ()) if cached in _cache}
+    tokens.add(token)
+    _tokens_by_user[principal.id] = tokens
+
+
+def invalidate_user(user_id: int):
+    """Drops every cached token of a user (call after the user row changes)."""
+    for token in _tokens_by_user.pop(user_id, ()):
+        if _cache.pop(token, None) is not None:
+            _stats["invalidations"] += 1
+
+
+def get_stats() -> dict:
+    return {**_stats, "size": len(_cache), "max_size": _cache.maxsize, "max_ttl_seconds": PRINCIPAL_CACHE_TTL_SECONDS}
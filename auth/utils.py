@@ -1,9 +1,16 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 import bcrypt
+from config import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_CONCURRENCY
+
+logger = logging.getLogger(__name__)
 
 def get_password_hash(password: str) -> str:
     """Hashes the password using bcrypt."""
     # Generate a salt and hash the password
-    hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS))
     # Return the hashed password as a UTF-8 encoded string
     return hashed_password.decode('utf-8')
 
@@ -13,15 +20,67 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     plain_password_bytes = plain_password.encode('utf-8')
     hashed_password_bytes = hashed_password.encode('utf-8')
 
-    # Print debug information
-    print(f"Plain Password (str): {plain_password}")
-    print(f"Plain Password (bytes): {plain_password_bytes}")
-    print(f"Hashed Password (str): {hashed_password}")
-    print(f"Hashed Password (bytes): {hashed_password_bytes}")
-    print(f"Length of Plain Password (bytes): {len(plain_password_bytes)}")
-    print(f"Length of Hashed Password (bytes): {len(hashed_password_bytes)}")
-
-    # Perform verification
+    # Perform verification (never log the passwords or hashes themselves)
     verification = bcrypt.checkpw(plain_password_bytes, hashed_password_bytes)
-    print(f"Verification Result: {verification}")
-    return verification
\ No newline at end of file
+    logger.debug("Password verification result: %s", verification)
+    return verification
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True if the hash was made with a different cost factor than BCRYPT_ROUNDS."""
+    # bcrypt hashes look like $2b$<cost>$<salt + hash>
+    try:
+        return int(hashed_password.split('$')[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+# bcrypt takes tens of milliseconds per call, so the async helpers below run it on a dedicated, bounded
+# thread pool. The semaphore caps how many calls can be queued or running at once.
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_slots = None  # asyncio.Semaphore, created lazily inside the running event loop
+
+_stats = {"hashes": 0, "verifies": 0, "max_queue_wait_ms": 0.0, "_queue_wait_total_ms": 0.0}
+
+
+async def _run_in_hash_pool(func, *args):
+    global _hash_slots
+    if _hash_slots is None:
+        _hash_slots = asyncio.Semaphore(PASSWORD_HASH_MAX_CONCURRENCY)
+    submitted = time.perf_counter()
+
+    def timed_call():
+        # Time spent waiting for a semaphore slot and a free thread before bcrypt starts
+        queue_wait_ms = (time.perf_counter() - submitted) * 1000
+        return queue_wait_ms, func(*args)
+
+    async with _hash_slots:
+        loop = asyncio.get_running_loop()
+        queue_wait_ms, result = await loop.run_in_executor(_hash_executor, timed_call)
+    _stats["_queue_wait_total_ms"] += queue_wait_ms
+    _stats["max_queue_wait_ms"] = max(_stats["max_queue_wait_ms"], queue_wait_ms)
+    return result
+
+
+async def hash_password_async(password: str) -> str:
+    """get_password_hash without blocking the event loop."""
+    _stats["hashes"] += 1
+    return await _run_in_hash_pool(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password without blocking the event loop."""
+    _stats["verifies"] += 1
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+
+def get_hashing_stats() -> dict:
+    calls = _stats["hashes"] + _stats["verifies"]
+    return {
+        "hashes": _stats["hashes"],
+        "verifies": _stats["verifies"],
+        "avg_queue_wait_ms": _stats["_queue_wait_total_ms"] / calls if calls else 0.0,
+        "max_queue_wait_ms": _stats["max_queue_wait_ms"],
+        "workers": PASSWORD_HASH_WORKERS,
+        "max_concurrency": PASSWORD_HASH_MAX_CONCURRENCY,
+        "rounds": BCRYPT_ROUNDS,
+    }
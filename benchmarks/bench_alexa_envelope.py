@@ -0,0 +1,86 @@
+"""
+Micro-benchmark for the Alexa envelope parse + response serialize path.
+
+Compares the old dict-walking approach (json.loads, nested lookups, json.dumps of a response dict)
+with the typed envelope and pre-serialized response templates used by routers/alexa.
+
+Run from the repository root:
+    python -m benchmarks.bench_alexa_envelope [--iterations 20000]
+"""
+import argparse
+import json
+import timeit
+
+from schemas.alexa import AlexaEnvelope
+from routers.alexa.responses import speech_body, LAUNCH_RESPONSE
+
+
+HELP_ENVELOPE = json.dumps({
+    "version": "1.0",
+    "session": {"new": False, "sessionId": "amzn1.echo-api.session.bench", "application": {"applicationId": "amzn1.ask.skill.bench"}},
+    "context": {
+        "System": {
+            "application": {"applicationId": "amzn1.ask.skill.bench"},
+            "device": {"deviceId": "amzn1.ask.device.BENCH", "supportedInterfaces": {}},
+            "apiEndpoint": "https://api.amazonalexa.com",
+        }
+    },
+    "request": {
+        "type": "IntentRequest",
+        "requestId": "amzn1.echo-api.request.bench",
+        "timestamp": "2024-10-01T12:00:00Z",
+        "locale": "en-US",
+        "intent": {"name": "RequestHelpIntent", "confirmationStatus": "NONE", "slots": {"Task": {"name": "Task", "value": "I need water"}}},
+    },
+}).encode()
+
+
+def legacy_help():
+    data = json.loads(HELP_ENVELOPE)
+    task = data['request']['intent']['slots'].get('Task', {}).get('value')
+    device_id = data['context']['System']['device']['deviceId']
+    return json.dumps({
+        "version": "1.0",
+        "response": {
+            "outputSpeech": {"type": "PlainText", "text": f"Task '{task}' has been created for {device_id}."},
+            "shouldEndSession": False
+        }
+    }).encode()
+
+
+def typed_help():
+    envelope = AlexaEnvelope.model_validate_json(HELP_ENVELOPE)
+    task = envelope.slot_value('Task')
+    device_id = envelope.device_id
+    return speech_body(f"Task '{task}' has been created for {device_id}.")
+
+
+def legacy_launch():
+    json.loads(HELP_ENVELOPE)
+    return json.dumps({
+        "version": "1.0",
+        "response": {"outputSpeech": {"type": "PlainText", "text": "How can I assist you today?"}, "shouldEndSession": False}
+    }).encode()
+
+
+def typed_launch():
+    AlexaEnvelope.model_validate_json(HELP_ENVELOPE)
+    return LAUNCH_RESPONSE
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    # Both paths have to produce the same JSON document
+    assert json.loads(legacy_help()) == json.loads(typed_help())
+
+    for name, func in [("legacy help", legacy_help), ("typed help", typed_help),
+                       ("legacy launch", legacy_launch), ("typed launch", typed_launch)]:
+        seconds = min(timeit.repeat(func, number=args.iterations, repeat=5))
+        print(f"{name:<14} {seconds / args.iterations * 1e6:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
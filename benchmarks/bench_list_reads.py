@@ -0,0 +1,157 @@
+"""
+Micro-benchmark for the large list reads: ORM entities vs. column rows.
+
+Seeds a throwaway database with one big community and, for each listing, compares the previous
+read path (full ORM instances with their relationships loaded) against the column-projection read
+in crud/. Reports wall time and peak Python memory (tracemalloc) per call, including the
+response-model validation and JSON serialization FastAPI does on the result.
+
+Run from the repository root (after pip install -r requirements-dev.txt):
+    python -m benchmarks.bench_list_reads
+    python -m benchmarks.bench_list_reads --rooms 5000 --staff 2000 --repeat 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Async SQLAlchemy URL (default: temporary aiosqlite file)")
+    parser.add_argument("--rooms", type=int, default=5000, help="Rooms (each with one Alexa device)")
+    parser.add_argument("--staff", type=int, default=2000, help="Care staff in the community")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per variant")
+    return parser.parse_args()
+
+
+def configure_environment(database_url):
+    # Must run before config.py is imported
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+async def seed(session_factory, room_count, staff_count):
+    from models.models import User, Community, Room, AlexaDevice
+
+    async with session_factory() as db:
+        manager = User(name="Bench Manager", email="bench@example.com", role="manager", hashed_password="x")
+        db.add(manager)
+        await db.flush()
+        community = Community(name="Bench Community", address="1 Bench St", created_by_id=manager.id, pin_code="BNCH2")
+        db.add(community)
+        await db.flush()
+        rooms = [Room(room_number=str(1000 + i), community_id=community.id, floor_number=i // 100) for i in range(room_count)]
+        db.add_all(rooms)
+        db.add_all([
+            User(name=f"Staff {i}", email=f"staff{i}@example.com", role="care_staff", hashed_password="x", community_id=community.id)
+            for i in range(staff_count)
+        ])
+        await db.flush()
+        db.add_all([
+            AlexaDevice(device_id=f"amzn1.ask.device.bench-{i}", room_id=room.id, community_id=community.id)
+            for i, room in enumerate(rooms)
+        ])
+        community_id = community.id
+        await db.commit()
+        return community_id
+
+
+async def measure(session_factory, read, repeat):
+    # One untimed warm-up, then best-of-N wall time and the peak traced memory of a single call
+    async with session_factory() as db:
+        await read(db)
+    timings = []
+    for _ in range(repeat):
+        async with session_factory() as db:
+            started = time.perf_counter()
+            await read(db)
+            timings.append(time.perf_counter() - started)
+    async with session_factory() as db:
+        tracemalloc.start()
+        await read(db)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return min(timings), peak
+
+
+def report(name, orm, projection):
+    (orm_time, orm_peak), (rows_time, rows_peak) = orm, projection
+    print(f"{name}")
+    print(f"  ORM entities     {orm_time * 1000:9.1f} ms  peak {orm_peak / 2**20:8.1f} MiB")
+    print(f"  column rows      {rows_time * 1000:9.1f} ms  peak {rows_peak / 2**20:8.1f} MiB"
+          f"  ({orm_time / rows_time:4.1f}x faster, {orm_peak / max(rows_peak, 1):4.1f}x less memory)")
+
+
+async def run(args):
+    from typing import List
+    from pydantic import TypeAdapter
+    from sqlalchemy.future import select
+    from sqlalchemy.orm import selectinload
+    from database_configs import db as database
+    from database_configs.db import Base
+    from models.models import Room, User
+    from schemas.room import RoomResponse
+    from schemas.care_staff import CareStaffResponse
+    from crud.crud_room import get_rooms_for_community
+    from crud.crud_care_staff import get_care_staff_for_community, CARE_STAFF_ROLE
+
+    # What FastAPI does with a response_model: validate the return value (from attributes), dump JSON
+    rooms_adapter = TypeAdapter(List[RoomResponse])
+    staff_adapter = TypeAdapter(List[CareStaffResponse])
+
+    try:
+        async with database.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.drop_all)
+            await connection.run_sync(Base.metadata.create_all)
+        community_id = await seed(database.SessionLocal, args.rooms, args.staff)
+
+        async def rooms_orm(db):
+            result = await db.execute(select(Room).options(selectinload(Room.alexa_devices)).filter(Room.community_id == community_id))
+            return rooms_adapter.dump_json(rooms_adapter.validate_python(result.scalars().all(), from_attributes=True))
+
+        async def rooms_projection(db):
+            rooms = await get_rooms_for_community(db, community_id)
+            return rooms_adapter.dump_json(rooms_adapter.validate_python(rooms, from_attributes=True))
+
+        async def staff_orm(db):
+            stmt = select(User).options(selectinload(User.community)).filter(User.community_id == community_id, User.role == CARE_STAFF_ROLE)
+            result = await db.execute(stmt)
+            return staff_adapter.dump_json(staff_adapter.validate_python(result.scalars().all(), from_attributes=True))
+
+        async def staff_projection(db):
+            staff = await get_care_staff_for_community(db, community_id)
+            return staff_adapter.dump_json(staff_adapter.validate_python(staff, from_attributes=True))
+
+        report(f"{args.rooms} rooms with devices",
+               await measure(database.SessionLocal, rooms_orm, args.repeat),
+               await measure(database.SessionLocal, rooms_projection, args.repeat))
+        report(f"{args.staff} care staff with community",
+               await measure(database.SessionLocal, staff_orm, args.repeat),
+               await measure(database.SessionLocal, staff_projection, args.repeat))
+    finally:
+        await database.engine.dispose()
+
+
+def main():
+    args = parse_args()
+    scratch = None
+    database_url = args.database_url
+    if database_url is None:
+        scratch = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        scratch.close()
+        database_url = f"sqlite+aiosqlite:///{scratch.name}"
+    configure_environment(database_url)
+    sys.path.insert(0, os.getcwd())
+    try:
+        asyncio.run(run(args))
+    finally:
+        if scratch is not None:
+            os.remove(scratch.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Micro-benchmark for the list response encoding.
+
+Builds room rows (each with one Alexa device) and task rows in memory and compares how a list
+response gets from those rows to JSON bytes:
+
+  per-object       model_validate() each row, then jsonable_encoder + json.dumps (the old from_orm loop)
+  response_model   what FastAPI does with a response_model: validate the list, dump_python(mode="json"),
+                   then encode that with the response class (json.dumps / orjson)
+  cached adapter   the TypeAdapter from schemas/adapters.py: validate + dump_json, bytes straight out
+                   of pydantic-core (routers/responses.list_response)
+
+No database is involved; this is only the validation and encoding cost per request.
+
+Run from the repository root:
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --rooms 5000 --tasks 50000 --repeat 5
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=5000, help="Rooms (each with one Alexa device)")
+    parser.add_argument("--tasks", type=int, default=50000, help="Tasks")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per variant")
+    return parser.parse_args()
+
+
+def build_rooms(count):
+    from crud.crud_room import RoomRow
+    from crud.crud_alexa_device import AlexaDeviceRow
+
+    synced = datetime(2024, 10, 1, 12, 0)
+    return [
+        RoomRow(id=i + 1, room_number=str(1000 + i), community_id=1, resident_id=None, floor_number=i // 100,
+                room_type="single", alexa_devices=[
+                    AlexaDeviceRow(id=i + 1, device_id=f"amzn1.ask.device.bench-{i}", room_id=i + 1, community_id=1,
+                                   status="active", last_synced=synced, last_request=synced, total_number_requested=i % 50),
+                ])
+        for i in range(count)
+    ]
+
+
+def build_tasks(count):
+    from types import SimpleNamespace
+
+    # Attribute access like an ORM Task, without the instrumentation cost muddying the numbers
+    created = datetime(2024, 10, 1, 12, 0)
+    return [
+        SimpleNamespace(id=i + 1, title="Bring fresh towels", description="Room asked through Alexa" if i % 2 else None,
+                        status="pending" if i % 3 else "completed", priority_score=i % 4 + 1,
+                        created_at=created + timedelta(seconds=i), community_id=1, room_id=i % 5000 + 1,
+                        alexa_device_id=i % 5000 + 1)
+        for i in range(count)
+    ]
+
+
+def measure(encode, repeat):
+    encode()  # Warm-up
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = encode()
+        timings.append(time.perf_counter() - started)
+    return min(timings), len(body)
+
+
+def report(name, results):
+    print(name)
+    baseline = results[0][1][0]
+    for label, (elapsed, size) in results:
+        print(f"  {label:<26} {elapsed * 1000:9.1f} ms  {size / 2**20:6.1f} MiB  ({baseline / elapsed:4.1f}x)")
+
+
+def compare(schema, adapter, rows, repeat):
+    import orjson
+    from fastapi.encoders import jsonable_encoder
+
+    def per_object():
+        return json.dumps(jsonable_encoder([schema.model_validate(row) for row in rows])).encode()
+
+    def response_model_json():
+        return json.dumps(adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json")).encode()
+
+    def response_model_orjson():
+        return orjson.dumps(adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json"))
+
+    def cached_adapter():
+        return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+    return [
+        ("per-object + json", measure(per_object, repeat)),
+        ("response_model + json", measure(response_model_json, repeat)),
+        ("response_model + orjson", measure(response_model_orjson, repeat)),
+        ("cached adapter dump_json", measure(cached_adapter, repeat)),
+    ]
+
+
+def run(args):
+    from schemas.room import RoomResponse
+    from schemas.task import TaskResponse
+    from schemas.adapters import room_list_adapter, task_list_adapter
+
+    report(f"{args.rooms} rooms with devices", compare(RoomResponse, room_list_adapter, build_rooms(args.rooms), args.repeat))
+    report(f"{args.tasks} tasks", compare(TaskResponse, task_list_adapter, build_tasks(args.tasks), args.repeat))
+
+
+def main():
+    args = parse_args()
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    sys.path.insert(0, os.getcwd())
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Replay benchmark for /alexa/actions.
+
+Replays Alexa request envelopes from a JSONL file (one envelope per line, lines that are not Alexa
+envelopes are skipped) plus synthetic LaunchRequest / RequestHelpIntent / RegisterDeviceIntent
+variants through the ASGI app in-process, against a throwaway database seeded with one community.
+
+Reports p50 / p95 / p99 latency, requests per second and SQL statements per request, per request kind.
+
+Run from the repository root (after pip install -r requirements-dev.txt):
+    python -m benchmarks.replay_alexa                                   # aiosqlite stand-in
+    python -m benchmarks.replay_alexa --database-url postgresql+asyncpg://user:pw@localhost/helpy_bench
+    python -m benchmarks.replay_alexa --envelopes my_envelopes.jsonl --requests 2000 --concurrency 8
+
+The Postgres database should be an empty scratch database, its tables are created and dropped.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+
+
+ROOM_COUNT = 50
+BENCH_PIN = "BNCH1"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--envelopes", default="requests.jsonl", help="JSONL file of recorded Alexa envelopes")
+    parser.add_argument("--database-url", default=None, help="Async SQLAlchemy URL (default: temporary aiosqlite file)")
+    parser.add_argument("--requests", type=int, default=500, help="Synthetic requests per kind")
+    parser.add_argument("--concurrency", type=int, default=1, help="Requests in flight at once")
+    return parser.parse_args()
+
+
+def configure_environment(database_url):
+    # Must run before the app (and config.py) is imported
+    os.environ["DATABASE_URL"] = database_url
+    # The benchmark replays many requests per device, keep admission control out of the measurement
+    os.environ.setdefault("ALEXA_DEVICE_RATE_PER_MINUTE", "100000000")
+    os.environ.setdefault("ALEXA_DEVICE_BURST", "100000000")
+    os.environ.setdefault("ALEXA_COMMUNITY_RATE_PER_MINUTE", "100000000")
+    os.environ.setdefault("ALEXA_COMMUNITY_BURST", "100000000")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")  # Per-request info logs would interleave with the report
+
+
+def envelope(request_type, device_id, intent_name=None, slots=None):
+    request = {"type": request_type, "requestId": f"amzn1.echo-api.request.{uuid.uuid4()}", "locale": "en-US"}
+    if intent_name:
+        request["intent"] = {
+            "name": intent_name,
+            "confirmationStatus": "NONE",
+            "slots": {name: {"name": name, "value": value} for name, value in (slots or {}).items()},
+        }
+    return {
+        "version": "1.0",
+        "context": {"System": {"device": {"deviceId": device_id, "supportedInterfaces": {}}}},
+        "request": request,
+    }
+
+
+def synthetic_envelopes(count):
+    launch = [envelope("LaunchRequest", f"amzn1.ask.device.bench-{i % ROOM_COUNT}") for i in range(count)]
+    help_requests = [
+        envelope("IntentRequest", f"amzn1.ask.device.bench-{i % ROOM_COUNT}", "RequestHelpIntent", {"Task": "I need water"})
+        for i in range(count)
+    ]
+    registrations = [
+        envelope("IntentRequest", f"amzn1.ask.device.new-{uuid.uuid4()}", "RegisterDeviceIntent",
+                 {"room": str(100 + i % ROOM_COUNT), "PIN": BENCH_PIN})
+        for i in range(count)
+    ]
+    return {"LaunchRequest": launch, "RequestHelpIntent": help_requests, "RegisterDeviceIntent": registrations}
+
+
+def recorded_envelopes(path):
+    # Keep only lines that look like Alexa envelopes; anything else in the file is ignored
+    envelopes, skipped = [], 0
+    if not os.path.exists(path):
+        return envelopes, skipped
+    with open(path) as handle:
+        for line in handle:
+            try:
+                data = json.loads(line)
+            except ValueError:
+                skipped += 1
+                continue
+            if isinstance(data, dict) and isinstance(data.get("request"), dict) and "type" in data["request"]:
+                envelopes.append(data)
+            else:
+                skipped += 1
+    return envelopes, skipped
+
+
+async def seed(session_factory):
+    from models.models import User, Community, Room, AlexaDevice
+
+    async with session_factory() as db:
+        manager = User(name="Bench Manager", email="bench@example.com", role="manager", hashed_password="x")
+        db.add(manager)
+        await db.flush()
+        community = Community(name="Bench Community", address="1 Bench St", created_by_id=manager.id, pin_code=BENCH_PIN)
+        db.add(community)
+        await db.flush()
+        rooms = [Room(room_number=str(100 + i), community_id=community.id) for i in range(ROOM_COUNT)]
+        db.add_all(rooms)
+        await db.flush()
+        db.add_all([
+            AlexaDevice(device_id=f"amzn1.ask.device.bench-{i}", room_id=room.id, community_id=community.id)
+            for i, room in enumerate(rooms)
+        ])
+        await db.commit()
+
+
+async def replay(client, envelopes, concurrency, query_counter):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(body):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post("/alexa/actions", content=body, headers={"content-type": "application/json"})
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise RuntimeError(f"/alexa/actions returned {response.status_code}: {response.text}")
+
+    bodies = [json.dumps(item).encode() for item in envelopes]
+    queries_before = query_counter["count"]
+    started = time.perf_counter()
+    await asyncio.gather(*(send(body) for body in bodies))
+    elapsed = time.perf_counter() - started
+    return latencies, elapsed, query_counter["count"] - queries_before
+
+
+def report(name, latencies, elapsed, queries):
+    if len(latencies) < 2:
+        print(f"{name:<22} {len(latencies):>6} requests (not enough samples)")
+        return
+    cuts = statistics.quantiles(latencies, n=100)
+    print(
+        f"{name:<22} {len(latencies):>6} req  "
+        f"p50 {cuts[49] * 1000:7.2f} ms  p95 {cuts[94] * 1000:7.2f} ms  p99 {cuts[98] * 1000:7.2f} ms  "
+        f"{len(latencies) / elapsed:8.1f} req/s  {queries / len(latencies):5.2f} queries/req"
+    )
+
+
+async def run(args):
+    import httpx
+    from sqlalchemy import event
+    from database_configs import db as database
+    from database_configs.db import Base
+    from main import app
+
+    query_counter = defaultdict(int)
+
+    @event.listens_for(database.engine.sync_engine, "before_cursor_execute")
+    def count_query(*_):
+        query_counter["count"] += 1
+
+    async with database.engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+    await seed(database.SessionLocal)
+
+    workloads = synthetic_envelopes(args.requests)
+    recorded, skipped = recorded_envelopes(args.envelopes)
+    if recorded:
+        workloads["recorded"] = recorded
+    print(f"{len(recorded)} recorded envelopes from {args.envelopes} ({skipped} non-envelope lines skipped)")
+
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            # Warm-up pass so imports, prepared statements and caches don't land in the first bucket.
+            # One help request per device primes the topology cache, so RequestHelpIntent reports the warm path.
+            await replay(client, workloads["LaunchRequest"][:10], 1, query_counter)
+            await replay(client, synthetic_envelopes(ROOM_COUNT)["RequestHelpIntent"], 1, query_counter)  # Fresh requestIds
+            for name, envelopes in workloads.items():
+                latencies, elapsed, queries = await replay(client, envelopes, args.concurrency, query_counter)
+                report(name, latencies, elapsed, queries)
+    finally:
+        await database.engine.dispose()
+
+
+def main():
+    args = parse_args()
+    scratch = None
+    database_url = args.database_url
+    if database_url is None:
+        scratch = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        scratch.close()
+        database_url = f"sqlite+aiosqlite:///{scratch.name}"
+    configure_environment(database_url)
+    sys.path.insert(0, os.getcwd())
+    try:
+        asyncio.run(run(args))
+    finally:
+        if scratch is not None:
+            os.remove(scratch.name)
+
+
+if __name__ == "__main__":
+    main()
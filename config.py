@@ -11,4 +11,87 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your_default_secret_key")  # If not found
 ALGORITHM = os.getenv("ALGORITHM", "HS256")  # Same here, default to 'HS256' if not set
 
 # JWT expiration time in minutes
-ACCESS_TOKEN_EXPIRE_MINUTES = 30  # Example: 30 minutes
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))  # Example: 30 minutes
+# Refresh tokens (opaque, rotated on every use) let clients get new access tokens without re-sending credentials
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+
+
+# Alexa device topology cache (device_id -> room / community / device pk)
+DEVICE_CACHE_MAX_SIZE = int(os.getenv("DEVICE_CACHE_MAX_SIZE", "10000"))  # Max number of devices kept in memory
+DEVICE_CACHE_TTL_SECONDS = int(os.getenv("DEVICE_CACHE_TTL_SECONDS", "300"))  # Entries expire after 5 minutes
+
+# Write-behind task ingestion queue (Alexa help intents are answered before the INSERT commits)
+TASK_QUEUE_ENABLED = os.getenv("TASK_QUEUE_ENABLED", "false").lower() == "true"  # Off by default, tasks are inserted inline
+TASK_QUEUE_MAX_SIZE = int(os.getenv("TASK_QUEUE_MAX_SIZE", "10000"))  # When full, handlers fall back to an inline insert
+TASK_QUEUE_BATCH_SIZE = int(os.getenv("TASK_QUEUE_BATCH_SIZE", "200"))  # Max tasks written per commit
+TASK_QUEUE_FLUSH_INTERVAL_MS = int(os.getenv("TASK_QUEUE_FLUSH_INTERVAL_MS", "50"))  # Max time a batch waits to fill up
+TASK_QUEUE_SHUTDOWN_TIMEOUT_SECONDS = float(os.getenv("TASK_QUEUE_SHUTDOWN_TIMEOUT_SECONDS", "10"))
+TASK_QUEUE_RETRY_DELAY_SECONDS = float(os.getenv("TASK_QUEUE_RETRY_DELAY_SECONDS", "1"))  # Wait before retrying while the database is down
+# Write-ahead journal for queued tasks (appended on enqueue, replayed on start). Required: without it
+# the queue stays off and tasks are inserted inline, so an accepted task is never only in memory.
+# Each worker process writes its own <path>.<pid> file; the journals of stopped workers are picked up on start.
+TASK_QUEUE_JOURNAL_PATH = os.getenv("TASK_QUEUE_JOURNAL_PATH")
+
+# Per-device request counters (AlexaDevice.last_request / total_number_requested) are flushed in one UPDATE
+DEVICE_COUNTER_FLUSH_INTERVAL_SECONDS = float(os.getenv("DEVICE_COUNTER_FLUSH_INTERVAL_SECONDS", "10"))
+
+# Alexa retry de-duplication, responses are remembered per request.requestId
+IDEMPOTENCY_CACHE_MAX_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_MAX_SIZE", "10000"))
+IDEMPOTENCY_CACHE_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_CACHE_TTL_SECONDS", "300"))  # Alexa retries within seconds
+
+# Token-bucket admission control on /alexa/actions (per Echo device and per community)
+ALEXA_DEVICE_RATE_PER_MINUTE = float(os.getenv("ALEXA_DEVICE_RATE_PER_MINUTE", "10"))  # Sustained requests per device
+ALEXA_DEVICE_BURST = int(os.getenv("ALEXA_DEVICE_BURST", "5"))  # Requests a device can make back to back
+ALEXA_COMMUNITY_RATE_PER_MINUTE = float(os.getenv("ALEXA_COMMUNITY_RATE_PER_MINUTE", "600"))
+ALEXA_COMMUNITY_BURST = int(os.getenv("ALEXA_COMMUNITY_BURST", "200"))
+RATE_LIMIT_MAX_TRACKED_KEYS = int(os.getenv("RATE_LIMIT_MAX_TRACKED_KEYS", "50000"))  # Bounds memory used by buckets
+
+# In-process request classifier (task type + emergency level), trained offline with data_processing/train_local_classifier.py
+CLASSIFIER_MODEL_PATH = os.getenv("CLASSIFIER_MODEL_PATH", "request_classifier.joblib")  # Missing file = classifier disabled
+CLASSIFIER_WORKERS = int(os.getenv("CLASSIFIER_WORKERS", "2"))  # Threads used for scoring, keeps predict() off the event loop
+CLASSIFIER_BATCH_MAX_SIZE = int(os.getenv("CLASSIFIER_BATCH_MAX_SIZE", "32"))  # Utterances scored per predict call
+CLASSIFIER_BATCH_MAX_WAIT_MS = float(os.getenv("CLASSIFIER_BATCH_MAX_WAIT_MS", "5"))  # Max time an utterance waits for a batch
+
+# Community PIN allocation, candidate PINs are validated in batches and kept in a small in-process pool
+PIN_POOL_BATCH_SIZE = int(os.getenv("PIN_POOL_BATCH_SIZE", "32"))  # Candidates checked per query
+PIN_POOL_MAX_ROUNDS = int(os.getenv("PIN_POOL_MAX_ROUNDS", "3"))  # Upper bound on queries per refill
+
+# Verified-principal cache for get_current_user (token -> user snapshot), bounded by the token's exp
+PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))  # Max time a user change can go unnoticed by other workers
+
+# bcrypt hashing runs on a dedicated thread pool instead of the event loop
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))  # Cost factor, existing hashes are upgraded on login when it changes
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))  # Threads doing bcrypt work
+PASSWORD_HASH_MAX_CONCURRENCY = int(os.getenv("PASSWORD_HASH_MAX_CONCURRENCY", "32"))  # Max hash/verify calls queued or running
+
+# Logging (see logging_config.py); records are handed to a background thread through a queue
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # 'json' or 'text'
+# Per-module sampling of records below WARNING, e.g. "routers.alexa=0.1,crud=0.5" keeps 10% / 50% of them
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+# Echo every SQL statement (synchronous stdout writes, keep off in production)
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+
+# Database engine / connection pool (applied to postgresql URLs, sqlite uses SQLAlchemy's defaults)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))  # Connections kept open per worker process
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))  # Extra connections allowed above DB_POOL_SIZE under load
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "10"))  # Max wait for a free connection
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))  # Reconnect connections older than this
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"  # Check connections on checkout
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))  # asyncpg prepared statements, 0 behind pgbouncer in transaction mode
+DB_COMMAND_TIMEOUT_SECONDS = float(os.getenv("DB_COMMAND_TIMEOUT_SECONDS", "30"))  # asyncpg client-side query timeout
+DB_APPLICATION_NAME = os.getenv("DB_APPLICATION_NAME", "helpy-backend")  # Shows up in pg_stat_activity
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))  # Server-side statement_timeout, 0 = server default
+
+# Optional read-only replica for GET routes, reads go to the primary when unset
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL", "")
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", str(DB_POOL_SIZE)))
+DB_READ_MAX_OVERFLOW = int(os.getenv("DB_READ_MAX_OVERFLOW", str(DB_MAX_OVERFLOW)))
+
+# Task history export (/api/tasks/export), rows are fetched from a server-side cursor in batches of this size
+TASK_EXPORT_BATCH_SIZE = int(os.getenv("TASK_EXPORT_BATCH_SIZE", "2000"))
+
+# Bulk room import (/api/rooms/import), rows are upserted in chunks of ROOM_IMPORT_CHUNK_SIZE in one transaction
+ROOM_IMPORT_MAX_ROWS = int(os.getenv("ROOM_IMPORT_MAX_ROWS", "10000"))
+ROOM_IMPORT_CHUNK_SIZE = int(os.getenv("ROOM_IMPORT_CHUNK_SIZE", "500"))
@@ -1,7 +1,37 @@
+from datetime import datetime
+from typing import NamedTuple, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from models.models import AlexaDevice, Room, Community  # Adjusted import to point to models folder
 from schemas.alexadevice import AlexaDeviceCreate, AlexaDeviceUpdate  # Adjusted import to point to schema folder
 from sqlalchemy.future import select
+from sqlalchemy import update, values, column, bindparam, exists, and_, or_, case, Integer, DateTime
+from crud.utils import dialect_insert
+from services import device_cache
+from services.device_cache import DeviceTopology
+
+# Read-only device row for list endpoints: the AlexaDeviceResponse columns, no ORM instance or identity map
+class AlexaDeviceRow(NamedTuple):
+    id: int
+    device_id: str
+    room_id: int
+    community_id: Optional[int]
+    status: str
+    last_synced: Optional[datetime]
+    last_request: Optional[datetime]
+    total_number_requested: int
+
+
+ALEXA_DEVICE_ROW_COLUMNS = (
+    AlexaDevice.id,
+    AlexaDevice.device_id,
+    AlexaDevice.room_id,
+    AlexaDevice.community_id,
+    AlexaDevice.status,
+    AlexaDevice.last_synced,
+    AlexaDevice.last_request,
+    AlexaDevice.total_number_requested,
+)
+
 
 # Create a new Alexa device (async version)
 async def create_alexa_device(db: AsyncSession, device: AlexaDeviceCreate):
@@ -17,6 +47,7 @@ async def create_alexa_device(db: AsyncSession, device: AlexaDeviceCreate):
     db.add(db_device)
     await db.commit()
     await db.refresh(db_device)
+    device_cache.invalidate(device.device_id)
     return db_device
 
 # Get an Alexa device by device_id (async version)
@@ -35,10 +66,11 @@ async def update_alexa_device(db: AsyncSession, device_id: str, updates: AlexaDe
     db_device = result.scalars().first()
     if not db_device:
         return None
-    for key, value in updates.dict(exclude_unset=True).items():
+    for key, value in updates.model_dump(exclude_unset=True).items():
         setattr(db_device, key, value)
     await db.commit()
     await db.refresh(db_device)
+    device_cache.invalidate(device_id)
     return db_device
 
 # Delete an Alexa device (async version)
@@ -48,36 +80,120 @@ async def delete_alexa_device(db: AsyncSession, device_id: str):
     if db_device:
         await db.delete(db_device)
         await db.commit()
+        device_cache.invalidate(device_id)
     return db_device
 
 
 # Get all Alexa devices (global view)
-async def get_all_alexa_devices(db: AsyncSession):
-    result = await db.execute(select(AlexaDevice))
-    return result.scalars().all()
+async def get_all_alexa_devices(db: AsyncSession) -> list[AlexaDeviceRow]:
+    result = await db.execute(select(*ALEXA_DEVICE_ROW_COLUMNS).order_by(AlexaDevice.id))
+    return [AlexaDeviceRow(*row) for row in result]
 
 # Get Alexa devices for a specific community
-async def get_alexa_devices_by_community(db: AsyncSession, community_id: int):
-    result = await db.execute(select(AlexaDevice).filter(AlexaDevice.community_id == community_id))
-    return result.scalars().all()
+async def get_alexa_devices_by_community(db: AsyncSession, community_id: int) -> list[AlexaDeviceRow]:
+    stmt = select(*ALEXA_DEVICE_ROW_COLUMNS).filter(AlexaDevice.community_id == community_id).order_by(AlexaDevice.id)
+    result = await db.execute(stmt)
+    return [AlexaDeviceRow(*row) for row in result]
+
 
+# Resolve an Alexa device_id to its room, community and AlexaDevice id.
+# Served from the in-process topology cache when warm; on a miss only the three ids are selected,
+# so no Room / Community object graph gets loaded on the help-intent hot path.
+async def get_device_topology(db: AsyncSession, alexa_device_id: str):
+    topology = device_cache.get(alexa_device_id)
+    if topology is not None:
+        return topology
 
-# Function to get the room and community from the Alexa device's device_id
-async def get_room_and_community_from_alexa(db: AsyncSession, alexa_device_id: str):
-    # Query the AlexaDevice by its device_id (string)
-    stmt = select(AlexaDevice).filter(AlexaDevice.device_id == alexa_device_id)
+    stmt = (
+        select(AlexaDevice.id, AlexaDevice.room_id, Room.community_id)
+        .join(Room, AlexaDevice.room_id == Room.id)
+        .filter(AlexaDevice.device_id == alexa_device_id)
+    )
     result = await db.execute(stmt)
-    alexa_device = result.scalars().first()
+    row = result.first()
+
+    if not row:
+        return None  # No Alexa device (or room) found for the given device_id
+
+    topology = DeviceTopology(room_id=row.room_id, community_id=row.community_id, alexa_device_id=row.id)
+    device_cache.put(alexa_device_id, topology)
+    return topology
+
 
-    if not alexa_device:
-        return None, None  # No Alexa device found for the given device_id
+# The later of two request times (a NULL stored time counts as earlier). CASE rather than GREATEST,
+# which SQLite doesn't have.
+def _later_request(stored, new):
+    return case((or_(stored.is_(None), new > stored), new), else_=stored)
 
-    # Now that we have the AlexaDevice, get the associated room
-    room = alexa_device.room
-    if not room:
-        return None, None  # No room found for the given Alexa device
 
-    # Fetch the community associated with the room
-    community = room.community
+# Apply coalesced request counts to many devices in one statement:
+# UPDATE alexa_devices SET ... FROM (VALUES (id, delta, last_request), ...) AS v WHERE alexa_devices.id = v.id
+# `counters` maps AlexaDevice.id -> (number of new requests, time of the latest request)
+async def increment_request_counters(db: AsyncSession, counters: dict):
+    if not counters:
+        return
+    if db.bind.dialect.name != "postgresql":
+        # SQLite can't name the columns of a VALUES list: the same UPDATE as one executemany
+        devices = AlexaDevice.__table__
+        stmt = (
+            update(devices)
+            .where(devices.c.id == bindparam("device_pk"))
+            .values(
+                total_number_requested=devices.c.total_number_requested + bindparam("delta"),
+                last_request=_later_request(devices.c.last_request, bindparam("request_at", type_=DateTime(timezone=True))),
+            )
+        )
+        await db.execute(stmt, [
+            {"device_pk": device_id, "delta": count, "request_at": last_request}
+            for device_id, (count, last_request) in counters.items()
+        ])
+        await db.commit()
+        return
+
+    deltas = values(
+        column("id", Integer),
+        column("delta", Integer),
+        column("last_request", DateTime(timezone=True)),
+        name="deltas"
+    ).data([(device_id, count, last_request) for device_id, (count, last_request) in counters.items()])
+
+    stmt = (
+        update(AlexaDevice)
+        .where(AlexaDevice.id == deltas.c.id)
+        .values(
+            total_number_requested=AlexaDevice.total_number_requested + deltas.c.delta,
+            last_request=_later_request(AlexaDevice.last_request, deltas.c.last_request)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(stmt)
+    await db.commit()
+
 
-    return room, community, alexa_device.id  # Return the room, community, and the AlexaDevice's id (integer)
+# Everything device registration needs in one statement: the community for the PIN, the room with that
+# number inside it and whether the device is already registered. Returns None when the PIN is unknown,
+# room_id is None when the room does not exist in that community.
+async def get_registration_target(db: AsyncSession, pin_code: str, room_number: str, device_id: str):
+    device_exists = exists().where(AlexaDevice.device_id == device_id).label("device_exists")
+    stmt = (
+        select(Community.id.label("community_id"), Room.id.label("room_id"), device_exists)
+        .outerjoin(Room, and_(Room.community_id == Community.id, Room.room_number == room_number))
+        .filter(Community.pin_code == pin_code)
+    )
+    result = await db.execute(stmt)
+    return result.first()
+
+# Register a device with INSERT ... ON CONFLICT (device_id) DO NOTHING.
+# Returns the new AlexaDevice id, or None if the device_id was already registered (e.g. a concurrent registration won).
+async def register_alexa_device(db: AsyncSession, device_id: str, room_id: int, community_id: int):
+    stmt = (
+        dialect_insert(db, AlexaDevice)
+        .values(device_id=device_id, room_id=room_id, community_id=community_id, status="active", total_number_requested=0)
+        .on_conflict_do_nothing(index_elements=[AlexaDevice.device_id])
+        .returning(AlexaDevice.id)
+    )
+    result = await db.execute(stmt)
+    new_device_id = result.scalar()
+    await db.commit()
+    device_cache.invalidate(device_id)
+    return new_device_id
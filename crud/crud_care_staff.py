@@ -1,15 +1,59 @@
+from datetime import datetime
+from typing import NamedTuple, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from models.models import User
+from sqlalchemy.orm import selectinload
+from models.models import User, Community
 from schemas.user import UserCreate, UserUpdate
-from auth.utils import get_password_hash
+from auth.utils import hash_password_async
+from auth import principal_cache
+from crud.pagination import Page, fetch_page
+from crud.crud_user import USER_SORT_KEY
 
 # Care Staff Role Filter
 CARE_STAFF_ROLE = 'care_staff'  # Ensure this role is added to the Enum in your models
 
-# Fetch a specific care staff by ID
+
+# Read-only rows for care staff lists (the CareStaffResponse fields), selected with one outer join
+class CareStaffCommunityRow(NamedTuple):
+    id: int
+    name: str
+    address: str
+    email: Optional[str]
+    phone_number: Optional[str]
+    created_at: datetime
+    created_by_id: int
+
+
+class CareStaffRow(NamedTuple):
+    id: int
+    name: str
+    email: str
+    role: str
+    created_at: datetime
+    updated_at: Optional[datetime]
+    community: Optional[CareStaffCommunityRow]
+
+    @classmethod
+    def from_row(cls, row):
+        community = CareStaffCommunityRow(*row[6:]) if row[6] is not None else None
+        return cls(*row[:6], community=community)
+
+
+def _care_staff_rows_stmt():
+    return (
+        select(
+            User.id, User.name, User.email, User.role, User.created_at, User.updated_at,
+            Community.id, Community.name, Community.address, Community.email, Community.phone_number,
+            Community.created_at, Community.created_by_id,
+        )
+        .outerjoin(Community, User.community_id == Community.id)
+        .filter(User.role == CARE_STAFF_ROLE)
+    )
+
+# Fetch a specific care staff by ID (with the community CareStaffResponse includes)
 async def get_care_staff_by_id(db: AsyncSession, user_id: int):
-    stmt = select(User).filter(User.id == user_id, User.role == CARE_STAFF_ROLE)
+    stmt = select(User).options(selectinload(User.community)).filter(User.id == user_id, User.role == CARE_STAFF_ROLE)
     result = await db.execute(stmt)
     return result.scalars().first()
 
@@ -20,15 +64,18 @@ async def get_care_staff_by_email(db: AsyncSession, email: str):
     return result.scalars().first()
 
 # Fetch all care staff with pagination
-async def get_care_staff(db: AsyncSession, skip: int = 0, limit: int = 10):
-    stmt = select(User).filter(User.role == CARE_STAFF_ROLE).offset(skip).limit(limit)
-    result = await db.execute(stmt)
-    return result.scalars().all()
+async def get_care_staff(db: AsyncSession, skip: int = 0, limit: int = 10, cursor: str = None) -> Page:
+    return await fetch_page(db, _care_staff_rows_stmt(), USER_SORT_KEY, cursor=cursor, skip=skip, limit=limit, row_factory=CareStaffRow.from_row)
+
+# Fetch all care staff of a community
+async def get_care_staff_for_community(db: AsyncSession, community_id: int) -> list[CareStaffRow]:
+    result = await db.execute(_care_staff_rows_stmt().filter(User.community_id == community_id).order_by(User.id))
+    return [CareStaffRow.from_row(row) for row in result]
 
 # Create a new care staff
 async def create_care_staff(db: AsyncSession, user: UserCreate):
     # Hash the password before storing
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await hash_password_async(user.password)
     db_user = User(
         name=user.name,
         email=user.email,
@@ -37,26 +84,30 @@ async def create_care_staff(db: AsyncSession, user: UserCreate):
         community_id=user.community_id  # Assuming care staff is assigned to a community
     )
     db.add(db_user)
+    await db.flush()  # Assigns the id
+    user_id = db_user.id
     await db.commit()
-    await db.refresh(db_user)
-    return db_user
+    return await get_care_staff_by_id(db, user_id)  # Loads the columns and community in one round of queries
 
 # Update an existing care staff
 async def update_care_staff(db: AsyncSession, user_id: int, user_update: UserUpdate):
     db_user = await get_care_staff_by_id(db, user_id)  # Check if the care staff exists
     if not db_user:
         return None
-    for key, value in user_update.dict(exclude_unset=True).items():
+    for key, value in user_update.model_dump(exclude_unset=True).items():
         setattr(db_user, key, value)
     await db.commit()
-    await db.refresh(db_user)
-    return db_user
+    principal_cache.invalidate_user(user_id)
+    return await get_care_staff_by_id(db, user_id)  # Reload columns and community expired by the commit
 
 # Delete an existing care staff
 async def delete_care_staff(db: AsyncSession, user_id: int):
     db_user = await get_care_staff_by_id(db, user_id)  # Check if the care staff exists
     if not db_user:
         return None
+    if db_user.community is not None:
+        db.expunge(db_user.community)  # Keep it loaded for the response, commit would expire it
     await db.delete(db_user)
     await db.commit()
+    principal_cache.invalidate_user(user_id)
     return db_user
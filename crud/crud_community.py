@@ -1,3 +1,4 @@
+import logging
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from models.models import Community, User
@@ -5,19 +6,18 @@ from schemas.community import CommunityCreate, CommunityUpdate
 from crud.crud_user import update_user, get_user  # Import your existing update_user function
 from schemas.user import UserUpdate  # Import the UserUpdate schema
 from fastapi import HTTPException
-import random
-import string
+from services import pin_pool, device_cache
+from auth import principal_cache
+from crud.pagination import Page, fetch_page
+
+logger = logging.getLogger(__name__)
 
 
 
 # Helper function to generate a unique 5-character alphanumeric PIN
+# Candidates are validated in batches (one query per batch) and kept in a pool, see services/pin_pool.py
 async def generate_unique_pin(db: AsyncSession):
-    while True:
-        pin_code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=5))
-        # Ensure the PIN is unique across all communities
-        existing_community = await db.execute(select(Community).filter(Community.pin_code == pin_code))
-        if not existing_community.scalars().first():
-            return pin_code  # Return the unique pin_code
+    return await pin_pool.allocate_pin(db)
 
 
 async def create_community(db: AsyncSession, community: CommunityCreate, creator_id: int):
@@ -40,16 +40,17 @@ async def create_community(db: AsyncSession, community: CommunityCreate, creator
         await db.commit()  # Commit to generate new_community.id
         await db.refresh(new_community)  # Now new_community.id will have the generated value
 
-        # Step 2: Retrieve and update the user using selectinload to fetch related community
+        # Step 2: Retrieve and update the user
         creator = await get_user(db, creator_id)
-        print(creator.id)
+        logger.info("Created community %s (creator %s)", new_community.id, creator_id)
         
         if creator:
             creator.community_id = new_community.id
             creator.role = 'manager'  # Update the role to 'manager'
             db.add(creator)
             await db.commit()  # Commit the user changes
-            await db.refresh(creator)  # Refresh the creator object
+            principal_cache.invalidate_user(creator_id)  # Role and community changed
+            await db.refresh(new_community)  # The second commit expired it again
 
         
         
@@ -66,18 +67,18 @@ async def get_community_by_id(db: AsyncSession, community_id: int):
     result = await db.execute(stmt)
     return result.scalars().first()
 
-# Get all communities with pagination
-async def get_communities(db: AsyncSession, skip: int = 0, limit: int = 10):
-    stmt = select(Community).offset(skip).limit(limit)
-    result = await db.execute(stmt)
-    return result.scalars().all()
+# Get all communities with pagination (keyset on id, skip kept for older clients)
+COMMUNITY_SORT_KEY = [(Community.id, False)]
+
+async def get_communities(db: AsyncSession, skip: int = 0, limit: int = 10, cursor: str = None) -> Page:
+    return await fetch_page(db, select(Community), COMMUNITY_SORT_KEY, cursor=cursor, skip=skip, limit=limit)
 
 # Update a community
 async def update_community(db: AsyncSession, community_id: int, community_update: CommunityUpdate):
     db_community = await get_community_by_id(db, community_id)
     if not db_community:
         return None
-    for key, value in community_update.dict(exclude_unset=True).items():
+    for key, value in community_update.model_dump(exclude_unset=True).items():
         setattr(db_community, key, value)
     await db.commit()
     await db.refresh(db_community)
@@ -90,6 +91,7 @@ async def delete_community(db: AsyncSession, community_id: int):
         return None
     await db.delete(db_community)
     await db.commit()
+    device_cache.invalidate_community(community_id)  # Help intents must not create tasks for its rooms
     return db_community
 
 # Get a community by its pin code
@@ -0,0 +1,78 @@
+import hashlib
+import secrets
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import update
+from models.models import RefreshToken, User
+from config import REFRESH_TOKEN_EXPIRE_DAYS
+
+
+# Only a SHA-256 of the token is stored; lookups go through the unique index on token_hash
+def hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+# Issue a new refresh token for a user, returns the opaque token to hand to the client
+async def create_refresh_token(db: AsyncSession, user_id: int):
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        token_hash=hash_refresh_token(token),
+        user_id=user_id,
+        expires_at=datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    await db.commit()
+    return token
+
+# Exchange a refresh token for a new one (rotation). Returns (new_token, user email) or None if the token is
+# unknown, expired or revoked. Presenting an already rotated token revokes every token of that user,
+# since it means the token was copied.
+async def rotate_refresh_token(db: AsyncSession, token: str):
+    now = datetime.now(timezone.utc)
+    stmt = (
+        select(RefreshToken, User.email, (RefreshToken.expires_at > now).label("is_current"))
+        .join(User, RefreshToken.user_id == User.id)
+        .filter(RefreshToken.token_hash == hash_refresh_token(token))
+        .with_for_update(of=RefreshToken)
+    )
+    result = await db.execute(stmt)
+    row = result.first()
+    if not row:
+        return None
+    db_token, email, is_current = row
+
+    if db_token.revoked_at is not None:
+        await revoke_user_refresh_tokens(db, db_token.user_id)
+        return None
+    if not is_current:
+        await db.rollback()
+        return None
+
+    db_token.revoked_at = now
+    new_token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        token_hash=hash_refresh_token(new_token),
+        user_id=db_token.user_id,
+        expires_at=now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    await db.commit()
+    return new_token, email
+
+# Revoke a single refresh token (logout)
+async def revoke_refresh_token(db: AsyncSession, token: str):
+    stmt = (
+        update(RefreshToken)
+        .where(RefreshToken.token_hash == hash_refresh_token(token), RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc))
+    )
+    await db.execute(stmt)
+    await db.commit()
+
+# Revoke every active refresh token of a user
+async def revoke_user_refresh_tokens(db: AsyncSession, user_id: int):
+    stmt = (
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc))
+    )
+    await db.execute(stmt)
+    await db.commit()
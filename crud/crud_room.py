@@ -1,7 +1,25 @@
+from typing import NamedTuple, Optional
 from sqlalchemy.ext.asyncio import AsyncSession  # Ensure you're using AsyncSession
-from models.models import Room
+from sqlalchemy import exists, func, literal_column
+from models.models import Room, AlexaDevice, User
 from schemas.room import RoomCreate, RoomUpdate, RoomResponse  # Adjust paths as needed
 from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from services import device_cache
+from crud.crud_alexa_device import AlexaDeviceRow, ALEXA_DEVICE_ROW_COLUMNS
+from crud.utils import dialect_insert
+
+
+# Read-only room row for list endpoints, built straight from the selected columns
+class RoomRow(NamedTuple):
+    id: int
+    room_number: str
+    community_id: int
+    resident_id: Optional[int]
+    floor_number: Optional[int]
+    room_type: Optional[str]
+    alexa_devices: list[AlexaDeviceRow]
 
 # Create a new room
 async def create_room(db: AsyncSession, room: RoomCreate, community_id: int):
@@ -15,21 +33,45 @@ async def create_room(db: AsyncSession, room: RoomCreate, community_id: int):
     db.add(db_room)
     await db.commit()
     await db.refresh(db_room)
+    set_committed_value(db_room, "alexa_devices", [])  # A new room has no devices yet, no need to query for them
     return db_room
 
-# Get a room by ID
+# Get a room by ID, with its Alexa devices (RoomResponse / alexa-status need them)
 async def get_room_by_id(db: AsyncSession, room_id: int):
-    result = await db.execute(select(Room).filter(Room.id == room_id))
+    result = await db.execute(select(Room).options(selectinload(Room.alexa_devices)).filter(Room.id == room_id))
     return result.scalars().first()
 
-# Get all rooms for a community
-async def get_rooms_for_community(db: AsyncSession, community_id: int):
-    result = await db.execute(select(Room).filter(Room.community_id == community_id))
-    return result.scalars().all()
+# Get all rooms for a community, with their Alexa devices.
+# Two column-only queries (rooms, then every device in the community) grouped in Python; nothing is
+# added to the session's identity map, which is most of the cost for large communities.
+async def get_rooms_for_community(db: AsyncSession, community_id: int) -> list[RoomRow]:
+    devices_by_room = {}
+    device_rows = await db.execute(
+        select(*ALEXA_DEVICE_ROW_COLUMNS)
+        .join(Room, AlexaDevice.room_id == Room.id)
+        .filter(Room.community_id == community_id)
+        .order_by(AlexaDevice.id)
+    )
+    for row in device_rows:
+        device = AlexaDeviceRow(*row)
+        devices_by_room.setdefault(device.room_id, []).append(device)
+
+    room_rows = await db.execute(
+        select(Room.id, Room.room_number, Room.community_id, Room.resident_id, Room.floor_number, Room.room_type)
+        .filter(Room.community_id == community_id)
+        .order_by(Room.id)
+    )
+    return [RoomRow(*row, alexa_devices=devices_by_room.get(row.id, [])) for row in room_rows]
+
+# (community_id, has any Alexa device) for a room, or None if the room doesn't exist
+async def get_room_alexa_status(db: AsyncSession, room_id: int):
+    has_device = exists().where(AlexaDevice.room_id == Room.id)
+    result = await db.execute(select(Room.community_id, has_device.label("alexa_connected")).filter(Room.id == room_id))
+    return result.first()
 
 # Update a room
 async def update_room(db: AsyncSession, room_id: int, room: RoomUpdate):
-    db_room = await get_room_by_id(db, room_id)
+    db_room = await db.get(Room, room_id)  # Usually already loaded by the router's ownership check
     if db_room is None:
         return None
 
@@ -39,17 +81,19 @@ async def update_room(db: AsyncSession, room_id: int, room: RoomUpdate):
     db_room.room_type = room.room_type
 
     await db.commit()
-    await db.refresh(db_room)
+    await db.refresh(db_room)  # Re-applies the selectinload it was loaded with, so devices come back too
+    device_cache.invalidate_room(room_id)
     return db_room
 
 # Delete a room
 async def delete_room(db: AsyncSession, room_id: int):
-    db_room = await get_room_by_id(db, room_id)
+    db_room = await db.get(Room, room_id)
     if db_room is None:
         return None
 
     await db.delete(db_room)
     await db.commit()
+    device_cache.invalidate_room(room_id)
     return db_room
 
 # Get a room by room number and community ID
@@ -57,3 +101,48 @@ async def get_room_by_number(db: AsyncSession, room_number: str, community_id: i
     result = await db.execute(select(Room).filter(Room.room_number == room_number, Room.community_id == community_id))
     return result.scalars().first()
 
+# Ids of the given users that belong to the community (residents referenced by a room import)
+async def get_community_user_ids(db: AsyncSession, user_ids, community_id: int) -> set[int]:
+    if not user_ids:
+        return set()
+    result = await db.execute(select(User.id).filter(User.id.in_(user_ids), User.community_id == community_id))
+    return set(result.scalars().all())
+
+# Columns an import can set; for an existing room a missing (None) value keeps the stored one
+ROOM_IMPORT_COLUMNS = ("resident_id", "floor_number", "room_type")
+
+# Insert or update many rooms of one community with INSERT ... ON CONFLICT (community_id, room_number) DO UPDATE,
+# chunk_size rows per statement and one commit for the whole import. rooms are RoomCreate-shaped dicts
+# with unique room numbers. Returns (created, updated) counts.
+async def upsert_rooms(db: AsyncSession, community_id: int, rooms: list[dict], chunk_size: int = 500):
+    postgres = db.bind.dialect.name == "postgresql"
+    created, updated_ids = 0, []
+    for start in range(0, len(rooms), chunk_size):
+        chunk = [{**room, "community_id": community_id} for room in rooms[start:start + chunk_size]]
+        existing_ids = set()
+        if not postgres:
+            # No xmax outside PostgreSQL: look up which rooms already exist before the upsert
+            result = await db.execute(select(Room.id).filter(
+                Room.community_id == community_id, Room.room_number.in_([room["room_number"] for room in chunk])))
+            existing_ids = set(result.scalars().all())
+
+        stmt = dialect_insert(db, Room).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Room.community_id, Room.room_number],
+            # coalesce: a column left out of the CSV / JSON (or an empty cell) must not wipe the stored value
+            set_={column: func.coalesce(stmt.excluded[column], Room.__table__.c[column]) for column in ROOM_IMPORT_COLUMNS},
+        )
+        if postgres:
+            # xmax is 0 for a freshly inserted row version and set for one written by DO UPDATE
+            result = await db.execute(stmt.returning(Room.id, literal_column("xmax = 0").label("inserted")))
+            rows = [(room_id, inserted) for room_id, inserted in result]
+        else:
+            result = await db.execute(stmt.returning(Room.id))
+            rows = [(room_id, room_id not in existing_ids) for room_id in result.scalars()]
+
+        created += sum(1 for _, inserted in rows if inserted)
+        updated_ids.extend(room_id for room_id, inserted in rows if not inserted)
+
+    await db.commit()
+    device_cache.invalidate_rooms(updated_ids)
+    return created, len(updated_ids)
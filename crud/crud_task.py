@@ -1,18 +1,119 @@
+from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from models.models import Task
-
-async def create_task(db: AsyncSession, task_type: str, alexa_device_id: int, community_id: int, room_id: int, description: str = None):
-    new_task = Task(
-        title=task_type,
-        description=description,
-        status="pending",
-        priority_score=1,  # Default priority score
-        alexa_device_id=alexa_device_id,  # Associate Alexa device
-        community_id=community_id,  # Associate community
-        room_id=room_id  # Associate room
-    )
+from sqlalchemy import insert, select
+from models.models import Task, Room, AlexaDevice
+from crud.pagination import Page, fetch_page
+
+
+# Orderings for the task list. Each one matches a composite index on tasks (see models.py):
+# 'priority' -> ix_tasks_community_status_priority, 'created_at' -> ix_tasks_community_created_at
+TASK_SORT_KEYS = {
+    "id": [(Task.id, False)],
+    "priority": [(Task.priority_score, True), (Task.created_at, False), (Task.id, False)],  # Most urgent, then oldest
+    "created_at": [(Task.created_at, True), (Task.id, True)],  # Newest first
+}
+
+
+# Column values for a new Alexa task, shared by the inline insert and the write-behind queue
+def build_task_fields(task_type: str, alexa_device_id: int, community_id: int, room_id: int, description: str = None, priority_score: int = 1):
+    return {
+        "title": task_type,
+        "description": description,
+        "status": "pending",
+        "priority_score": priority_score,  # Default priority score unless the classifier set one
+        "alexa_device_id": alexa_device_id,  # Associate Alexa device
+        "community_id": community_id,  # Associate community
+        "room_id": room_id  # Associate room
+    }
+
+async def create_task(db: AsyncSession, task_type: str, alexa_device_id: int, community_id: int, room_id: int, description: str = None, priority_score: int = 1):
+    new_task = Task(**build_task_fields(task_type, alexa_device_id, community_id, room_id, description, priority_score))
     
     db.add(new_task)
     await db.commit()  # Use await with async functions
-    await db.refresh(new_task)
-    return new_task
\ No newline at end of file
+    # No refresh: the help intent never reads the row back, so the INSERT is the only statement.
+    # Only new_task.id is usable afterwards: the other attributes are expired by the commit and
+    # reading one would lazy-load, which raises MissingGreenlet on an AsyncSession.
+    return new_task
+
+
+# Ids from the given set that are not a Room / AlexaDevice of the community (unknown ids included), one query per model
+async def get_ids_outside_community(db: AsyncSession, model, ids, community_id: int) -> set[int]:
+    ids = set(ids)
+    if not ids:
+        return set()
+    result = await db.execute(select(model.id).filter(model.id.in_(ids), model.community_id == community_id))
+    return ids - set(result.scalars().all())
+
+
+# Insert many tasks at once and return their ids (in the same order as the input rows).
+# SQLAlchemy renders this as multi-row INSERT ... VALUES (...), (...) RETURNING id statements
+# with one commit for the whole batch, instead of an INSERT + commit + refresh per task.
+async def create_tasks_bulk(db: AsyncSession, tasks: list[dict]):
+    if not tasks:
+        return []
+    stmt = insert(Task).returning(Task.id, sort_by_parameter_order=True)
+    result = await db.scalars(stmt, tasks)
+    task_ids = result.all()
+    await db.commit()
+    return task_ids
+
+
+# Filtered, keyset-paginated task list for one community
+async def get_tasks(
+    db: AsyncSession,
+    community_id: int,
+    room_id: int = None,
+    statuses: list[str] = None,
+    min_priority: int = None,
+    max_priority: int = None,
+    created_after: datetime = None,
+    created_before: datetime = None,
+    order_by: str = "id",
+    cursor: str = None,
+    skip: int = 0,
+    limit: int = 10,
+) -> Page:
+    stmt = select(Task).where(Task.community_id == community_id)
+    if room_id is not None:
+        stmt = stmt.where(Task.room_id == room_id)
+    if statuses:
+        stmt = stmt.where(Task.status.in_(statuses))
+    if min_priority is not None:
+        stmt = stmt.where(Task.priority_score >= min_priority)
+    if max_priority is not None:
+        stmt = stmt.where(Task.priority_score <= max_priority)
+    if created_after is not None:
+        stmt = stmt.where(Task.created_at >= created_after)
+    if created_before is not None:
+        stmt = stmt.where(Task.created_at < created_before)
+    return await fetch_page(db, stmt, TASK_SORT_KEYS[order_by], cursor=cursor, skip=skip, limit=limit)
+
+
+# Columns written by the task export, in output order (also the CSV header)
+TASK_EXPORT_COLUMNS = [
+    Task.id, Task.title, Task.description, Task.status, Task.priority_score,
+    Task.created_at, Task.community_id, Task.room_id, Task.alexa_device_id,
+]
+
+
+# Streams a community's tasks oldest first (ix_tasks_community_created_at) as batches of column rows.
+# db.stream + yield_per keeps a server-side cursor open on PostgreSQL, so only one batch is held
+# in memory at a time no matter how many tasks match.
+async def stream_task_rows(
+    db: AsyncSession,
+    community_id: int,
+    created_after: datetime = None,
+    created_before: datetime = None,
+    batch_size: int = 1000,
+):
+    stmt = select(*TASK_EXPORT_COLUMNS).where(Task.community_id == community_id)
+    if created_after is not None:
+        stmt = stmt.where(Task.created_at >= created_after)
+    if created_before is not None:
+        stmt = stmt.where(Task.created_at < created_before)
+    stmt = stmt.order_by(Task.created_at, Task.id).execution_options(yield_per=batch_size)
+
+    result = await db.stream(stmt)
+    async for rows in result.partitions():
+        yield rows
@@ -1,13 +1,14 @@
-from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from models.models import User
 from schemas.user import UserCreate, UserUpdate
 from auth.utils import get_password_hash
+from auth import principal_cache
+from crud.pagination import Page, fetch_page
 
 
 async def get_user(db: AsyncSession, user_id: int):
-    stmt = select(User).options(selectinload(User.community)).filter(User.id == user_id)
+    stmt = select(User).filter(User.id == user_id)
     result = await db.execute(stmt)
     return result.scalars().first()
 
@@ -16,10 +17,11 @@ async def get_user_by_email(db: AsyncSession, email: str):
     result = await db.execute(stmt)
     return result.scalars().first()
 
-async def get_users(db: AsyncSession, skip: int = 0, limit: int = 10):
-    stmt = select(User).offset(skip).limit(limit)
-    result = await db.execute(stmt)
-    return result.scalars().all()
+# Users are paged by id (ids increase with creation order)
+USER_SORT_KEY = [(User.id, False)]
+
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 10, cursor: str = None) -> Page:
+    return await fetch_page(db, select(User), USER_SORT_KEY, cursor=cursor, skip=skip, limit=limit)
 
 async def create_user(db: AsyncSession, user: UserCreate):
     # Use the get_password_hash function to hash the password
@@ -35,10 +37,11 @@ async def update_user(db: AsyncSession, user_id: int, user_update: UserUpdate):
     db_user = await get_user(db, user_id)  # Await the async function
     if not db_user:
         return None
-    for key, value in user_update.dict(exclude_unset=True).items():
+    for key, value in user_update.model_dump(exclude_unset=True).items():
         setattr(db_user, key, value)
     await db.commit()
     await db.refresh(db_user)
+    principal_cache.invalidate_user(user_id)
     return db_user
 
 async def delete_user(db: AsyncSession, user_id: int):
@@ -47,4 +50,5 @@ async def delete_user(db: AsyncSession, user_id: int):
         return None
     await db.delete(db_user)
     await db.commit()
+    principal_cache.invalidate_user(user_id)
     return db_user
\ No newline at end of file
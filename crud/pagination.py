@@ -0,0 +1,88 @@
+import base64
+import json
+from datetime import datetime
+from typing import NamedTuple, Optional, Sequence
+from sqlalchemy import DateTime, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# Keyset ("cursor") pagination.
+# A sort key is a list of (column, descending) pairs that ends in a unique column (normally the
+# primary key). Pages are fetched with WHERE <key> > <last key seen> ORDER BY <key> LIMIT n, so the
+# cost of a page doesn't grow with its position and rows inserted while paging don't shift later
+# pages. The cursor handed to clients is the last row's key, JSON encoded and base64url'd.
+
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class Page(NamedTuple):
+    items: list
+    next_cursor: Optional[str]  # None on the last page
+
+
+def encode_cursor(values: Sequence) -> str:
+    payload = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_key) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        raise InvalidCursor("Malformed cursor")
+    if not isinstance(values, list) or len(values) != len(sort_key):
+        raise InvalidCursor("Cursor does not match this listing")
+
+    decoded = []
+    for (column, _), value in zip(sort_key, values):
+        if value is not None and isinstance(column.type, DateTime):
+            try:
+                value = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise InvalidCursor("Malformed cursor")
+        if value is not None and not isinstance(value, column.type.python_type):
+            raise InvalidCursor("Cursor does not match this listing")
+        decoded.append(value)
+    return decoded
+
+
+def _after(sort_key, values):
+    # (a, b) after (x, y) == a > x OR (a = x AND b > y), with < for descending columns.
+    # Spelled out instead of a row-value comparison so columns can sort in different directions.
+    clauses = []
+    for position, (column, descending) in enumerate(sort_key):
+        equal_prefix = [prefix_column == prefix_value for (prefix_column, _), prefix_value in zip(sort_key[:position], values)]
+        step = column < values[position] if descending else column > values[position]
+        clauses.append(and_(*equal_prefix, step))
+    return or_(*clauses)
+
+
+def _key_of(item, sort_key):
+    return [getattr(item, column.key) for column, _ in sort_key]
+
+
+async def fetch_page(db: AsyncSession, stmt, sort_key, cursor: Optional[str] = None, skip: int = 0, limit: int = 10, row_factory=None) -> Page:
+    """Runs stmt one page at a time. With a cursor, skip is ignored; without one, skip still works as an offset.
+
+    stmt selects ORM entities by default; for column projections pass row_factory to build each item
+    from its row (the items need attributes named after the sort key columns).
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    stmt = stmt.order_by(*[column.desc() if descending else column.asc() for column, descending in sort_key])
+    if cursor:
+        stmt = stmt.where(_after(sort_key, decode_cursor(cursor, sort_key)))
+    elif skip:
+        stmt = stmt.offset(skip)
+
+    # One extra row tells us whether there is a next page without a COUNT query
+    result = await db.execute(stmt.limit(limit + 1))
+    items = [row_factory(row) for row in result] if row_factory else list(result.scalars().all())
+    if len(items) <= limit:
+        return Page(items, None)
+    items = items[:limit]
+    return Page(items, encode_cursor(_key_of(items[-1], sort_key)))
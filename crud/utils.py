@@ -0,0 +1,10 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# INSERT ... ON CONFLICT lives on the dialect-specific insert() construct.
+# Production runs on PostgreSQL; SQLite is only used as a stand-in by the benchmark harness.
+def dialect_insert(db: AsyncSession, table):
+    if db.bind.dialect.name == "sqlite":
+        return sqlite.insert(table)
+    return postgresql.insert(table)
@@ -0,0 +1,51 @@
+import argparse
+import joblib
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+
+# Train the in-process request classifier used by services/request_classifier.py.
+# Uses the same cleaned CSV as sagemaker/train.py ('Request', 'task_type', 'Emergency' columns),
+# but produces a small scikit-learn model that scores in well under a millisecond without a network hop.
+#
+#   python data_processing/train_local_classifier.py --csv ../../data/cleaned_nlm_data.csv --out request_classifier.joblib
+
+parser = argparse.ArgumentParser(description="Train the local task type / emergency classifier")
+parser.add_argument('--csv', default='../../data/cleaned_nlm_data.csv', help="Cleaned CSV produced by clean_data.py")
+parser.add_argument('--out', default='request_classifier.joblib', help="Where to write the model bundle")
+args = parser.parse_args()
+
+# Load the cleaned data and strip spaces from column names
+df = pd.read_csv(args.csv)
+df.columns = df.columns.str.strip()
+df = df.dropna(subset=['Request', 'task_type', 'Emergency'])
+
+X = df['Request'].astype(str).values
+y_task_type = df['task_type'].astype(str).values
+y_emergency = df['Emergency'].astype(int).values
+
+X_train, X_test, task_train, task_test, emergency_train, emergency_test = train_test_split(
+    X, y_task_type, y_emergency, test_size=0.2, random_state=42
+)
+
+# One shared vectorizer, one linear model per output (same two outputs as the TensorFlow model)
+vectorizer = TfidfVectorizer(ngram_range=(1, 2), min_df=1, sublinear_tf=True)
+X_train_vectorized = vectorizer.fit_transform(X_train)
+X_test_vectorized = vectorizer.transform(X_test)
+
+task_type_model = LogisticRegression(max_iter=1000).fit(X_train_vectorized, task_train)
+emergency_model = LogisticRegression(max_iter=1000).fit(X_train_vectorized, emergency_train)
+
+print(f"task_type accuracy: {task_type_model.score(X_test_vectorized, task_test):.3f}")
+print(f"emergency accuracy: {emergency_model.score(X_test_vectorized, emergency_test):.3f}")
+
+# Refit on all rows before saving
+X_vectorized = vectorizer.fit_transform(X)
+bundle = {
+    'vectorizer': vectorizer,
+    'task_type_model': LogisticRegression(max_iter=1000).fit(X_vectorized, y_task_type),
+    'emergency_model': LogisticRegression(max_iter=1000).fit(X_vectorized, y_emergency),
+}
+joblib.dump(bundle, args.out)
+print(f"Classifier saved as '{args.out}'")
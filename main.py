@@ -1,7 +1,13 @@
 from routers.alexa import main_alexa_router
 from fastapi import FastAPI
-from routers import user, task, community,care_staff,room, alexa_device   # Import the user router
+from routers import user, task, community,care_staff,room, alexa_device, metrics   # Import the user router
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+from logging_config import setup_logging, stop_logging
+from services import task_queue, request_counter, request_classifier
+from database_configs.db import dispose_engines
+from crud.pagination import InvalidCursor
+from fastapi.responses import ORJSONResponse
 
 
 # post, put, delete
@@ -9,7 +15,26 @@ from fastapi.middleware.cors import CORSMiddleware
 # database setup
 
 
-app = FastAPI()
+setup_logging()
+
+
+# Start background workers on startup and flush them on shutdown
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()  # No-op unless a previous lifespan in this process stopped the listener
+    await request_classifier.start()
+    await task_queue.start()
+    await request_counter.start()
+    yield
+    await request_counter.stop()
+    await task_queue.stop()
+    await request_classifier.stop()
+    await dispose_engines()  # Close pooled connections after the queues above have flushed
+    stop_logging()
+
+
+# orjson encodes every response built from a route's return value (list routes send pre-serialized bytes)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 origins = [
     "http://localhost:3000",  # React app URL
@@ -21,8 +46,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allow all HTTP methods
     allow_headers=["*"],  # Allow all headers
+    expose_headers=["X-Next-Cursor", "Link"],  # Pagination headers read by the dashboard
 )
 
+
+# A stale or hand-edited ?cursor= is a client error, not a 500
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request, exc: InvalidCursor):
+    return ORJSONResponse(status_code=400, content={"detail": str(exc)})
+
 @app.get("/")
 def read_root():
     return {"message": "Hello World"}
@@ -43,4 +75,5 @@ app.include_router(community.router, prefix="/api", tags=["communities"])
 app.include_router(care_staff.router, prefix="/api", tags=["care_staff"])  
 app.include_router(room.router, prefix="/api", tags=["rooms"])  # Added room router
 app.include_router(alexa_device.router, prefix="/api", tags=['alexa_devices'])
+app.include_router(metrics.router, prefix="/api", tags=['metrics'])
 
@@ -2,7 +2,7 @@ from sqlalchemy import Column, Integer, String, ForeignKey, Enum, DateTime, func
 from sqlalchemy.orm import relationship
 from database_configs.db import Base
 from enum import Enum as PyEnum
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import UniqueConstraint, Index
 
 
 # psql 
@@ -31,7 +31,7 @@ class User(Base):
 
     # Task one to many with communities
     community_id = Column(Integer, ForeignKey("communities.id", use_alter=True), nullable=True)
-    community = relationship("Community", back_populates="users", foreign_keys=[community_id], lazy='selectin')
+    community = relationship("Community", back_populates="users", foreign_keys=[community_id])
 
     room = relationship("Room", back_populates="resident", uselist=False)  # One-to-one relationship
     
@@ -100,6 +100,13 @@ class Task(Base):
     caregiver_logs = relationship("CaregiverLog", back_populates="task")
 
 
+# Composite indexes for the staff task list (/api/tasks), see crud_task.TASK_SORT_KEYS.
+# "Pending tasks in my community, most urgent first" is a range scan on the first one.
+Index("ix_tasks_community_status_priority", Task.community_id, Task.status, Task.priority_score.desc(), Task.created_at, Task.id)
+Index("ix_tasks_community_created_at", Task.community_id, Task.created_at, Task.id)
+Index("ix_tasks_room_created_at", Task.room_id, Task.created_at)
+
+
 
 
 #set up the community model
@@ -117,22 +124,22 @@ class Community(Base):
 
     # Foreign Key to User (Creator)
     created_by_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    created_by = relationship("User", foreign_keys=[created_by_id], lazy='selectin')
+    created_by = relationship("User", foreign_keys=[created_by_id])
 
     # One-to-Many relationship with Task
     tasks = relationship("Task", back_populates="community")
 
     # One-to-Many relationship with User (if users belong to specific communities)
-    users = relationship("User", back_populates="community", foreign_keys="[User.community_id]", lazy='selectin')
+    users = relationship("User", back_populates="community", foreign_keys="[User.community_id]")
 
     # one to many relationship with room
-    rooms = relationship("Room", back_populates="community", lazy='selectin')
+    rooms = relationship("Room", back_populates="community")
 
      # Automatically set created_at when a new record is inserted
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
     # Relationship with AlexaDevice
-    alexa_devices = relationship("AlexaDevice", back_populates="community", lazy='selectin')
+    alexa_devices = relationship("AlexaDevice", back_populates="community")
 
     # New: Unique alphanumeric PIN for the community
     pin_code = Column(String(5), unique=True, nullable=False, index=True)  # 5-character alphanumeric PIN
@@ -149,7 +156,7 @@ class AlexaDevice(Base):
     # Foreign Key to Room table
     # one to many relationship with room, a room can have multiple alexa's i guess
     room_id = Column(Integer, ForeignKey("rooms.id"), nullable=False)
-    room = relationship("Room", back_populates="alexa_devices", lazy='selectin')
+    room = relationship("Room", back_populates="alexa_devices")
     
 
     # Status of the device (e.g., active, inactive, offline)
@@ -168,7 +175,7 @@ class AlexaDevice(Base):
     tasks_requested = relationship("Task", back_populates="alexa_device")
 
     community_id = Column(Integer, ForeignKey("communities.id"), nullable=True)
-    community = relationship("Community", back_populates="alexa_devices", lazy='selectin')
+    community = relationship("Community", back_populates="alexa_devices")
 
 
     
@@ -182,14 +189,14 @@ class Room(Base):
     
     # Foreign Key to Community table
     community_id = Column(Integer, ForeignKey("communities.id"), nullable=False)
-    community = relationship("Community", back_populates="rooms", lazy='selectin')
+    community = relationship("Community", back_populates="rooms")
 
     # Optional Foreign Key to Resident User Profile (if a specific resident is linked to the room) 
     resident_id = Column(Integer, ForeignKey("users.id"), nullable=True, index = True)
     resident = relationship("User", back_populates="room", foreign_keys=[resident_id], uselist=False)
     
     # One-to-Many relationship with AlexaDevice
-    alexa_devices = relationship("AlexaDevice", back_populates="room", lazy='selectin')
+    alexa_devices = relationship("AlexaDevice", back_populates="room")
     
     # Optional fields for room properties
     floor_number = Column(Integer, nullable=True)  # Optional field to store the floor number
@@ -203,6 +210,23 @@ class Room(Base):
     __table_args__ = (UniqueConstraint('community_id', 'room_number', name='_community_room_uc'),)
 
 
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+    # Primary Key
+    id = Column(Integer, primary_key=True, index=True)
+
+    # SHA-256 of the opaque token handed to the client (the token itself is never stored)
+    token_hash = Column(String(64), nullable=False, unique=True, index=True)
+
+    # Owner of the token, tokens go away with the user
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    # Set when the token is rotated or the user logs out
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class Notification(Base):
     __tablename__ = "notifications"
     # Primary Key
@@ -1,94 +1,51 @@
+import logging
 from fastapi import HTTPException
-from crud.crud_alexa_device import create_alexa_device, get_alexa_device_by_id
-from crud.crud_room import get_room_by_number
-from crud.crud_community import get_community_by_pin
-from schemas.alexadevice import AlexaDeviceCreate
+from crud.crud_alexa_device import get_registration_target, register_alexa_device
+from schemas.alexa import AlexaEnvelope
+from .responses import speech_body
 
-async def handle_register_device_intent(data, db):
-    # Extract device ID from Alexa request
-    print(data)
+logger = logging.getLogger(__name__)
 
-    device_id = data['context']['System']['device']['deviceId']
+async def handle_register_device_intent(envelope: AlexaEnvelope, db) -> bytes:
+    # Extract device ID from Alexa request
+    device_id = envelope.device_id
 
     # Extract room number from slots
-    room_number = data['request']['intent']['slots']['room']['value']
+    room_number = envelope.slot_value('room')
 
     # Extract the PIN from slots
-    pin_code = data['request']['intent']['slots']['PIN']['value']
+    pin_code = envelope.slot_value('PIN')
 
     
 
     if not pin_code:
-        return {
-            "version": "1.0",
-            "response": {
-                "outputSpeech": {
-                    "type": "PlainText",
-                    "text": "PIN code is required to register the device. Please provide a valid PIN."
-                },
-                "shouldEndSession": False
-            }
-        }
+        return speech_body("PIN code is required to register the device. Please provide a valid PIN.")
+
+    if not room_number:
+        return speech_body("Room number is required to register the device. Please provide a valid room number.")
+
+    if not device_id:
+        return speech_body("I could not identify this device. Please try again.")
 
-    # Fetch the community using the pin code
-    community = await get_community_by_pin(db, pin_code)
-    if not community:
-        return {
-            "version": "1.0",
-            "response": {
-                "outputSpeech": {
-                    "type": "PlainText",
-                    "text": f"No community found with the provided PIN code '{pin_code}'. Please try again."
-                },
-                "shouldEndSession": False
-            }
-        }
+    # Fetch the community, the room within it and the existing-device flag in a single query
+    target = await get_registration_target(db, pin_code, room_number, device_id)
+    if not target:
+        return speech_body(f"No community found with the provided PIN code '{pin_code}'. Please try again.")
 
-    # Fetch the room within the community
-    room = await get_room_by_number(db, room_number, community.id)
-    if not room:
-        return {
-            "version": "1.0",
-            "response": {
-                "outputSpeech": {
-                    "type": "PlainText",
-                    "text": f"Room '{room_number}' not found in the community. Please provide a valid room number."
-                },
-                "shouldEndSession": False
-            }
-        }
+    if target.room_id is None:
+        return speech_body(f"Room '{room_number}' not found in the community. Please provide a valid room number.")
 
     # Check if the device is already registered
-    existing_device = await get_alexa_device_by_id(db, device_id)
-    if existing_device:
-        return {
-            "version": "1.0",
-            "response": {
-                "outputSpeech": {
-                    "type": "PlainText",
-                    "text": "This device is already registered to a room. If you need to change the room, please contact support."
-                },
-                "shouldEndSession": False
-            }
-        }
+    already_registered = speech_body("This device is already registered to a room. If you need to change the room, please contact support.")
+    if target.device_exists:
+        return already_registered
     
-    # Register the Alexa device
-    alexa_device = AlexaDeviceCreate(
-        device_id=device_id,
-        room_id=room.id,
-        community_id=community.id
-    )
-    await create_alexa_device(db, alexa_device)
+    # Register the Alexa device; ON CONFLICT DO NOTHING settles concurrent registrations of the same device
+    new_device_id = await register_alexa_device(db, device_id, room_id=target.room_id, community_id=target.community_id)
+    if new_device_id is None:
+        return already_registered
+    logger.info("Registered Alexa device %s to room %s of community %s", device_id, target.room_id, target.community_id)
 
     
     # Return a success response to Alexa
-    return {
-        "version": "1.0",
-        "response": {
-            "outputSpeech": {
-                "type": "PlainText",
-                "text": f"Device registered successfully for Room {room_number}."
-            },
-            "shouldEndSession": True
-        }
-    }
+    return speech_body(f"Device registered successfully for Room {room_number}.", should_end_session=True)
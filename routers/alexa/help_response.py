@@ -1,45 +1,63 @@
+import logging
 from fastapi import HTTPException
-from crud.crud_task import create_task
-from crud.crud_alexa_device import get_room_and_community_from_alexa  # Import the helper function
+from crud.crud_task import create_task, build_task_fields
+from services import task_queue, request_counter, inference_batcher
+from crud.crud_alexa_device import get_device_topology  # Import the helper function
+from schemas.alexa import AlexaEnvelope
+from .responses import speech_body, DEFAULT_RESPONSE
 
-async def handle_help_intent(data, db):
-    task = data['request']['intent']['slots'].get('Task', {}).get('value')
-    device_id = data['context']['System']['device']['deviceId']  # Extract the Alexa device ID from the request
+logger = logging.getLogger(__name__)
+
+async def handle_help_intent(envelope: AlexaEnvelope, db) -> bytes:
+    task = envelope.slot_value('Task')
+    device_id = envelope.device_id  # Extract the Alexa device ID from the request
 
     if task and device_id:
         try:
-            # Use the helper function to get the room, community, and AlexaDevice ID from the Alexa device_id
-            room, community, alexa_device_id = await get_room_and_community_from_alexa(db, device_id)
+            # Use the helper function to get the room, community, and AlexaDevice ID from the Alexa device_id (cached)
+            topology = await get_device_topology(db, device_id)
 
-            if not room or not community:
+            if not topology:
                 raise HTTPException(status_code=404, detail="Room or Community not found")
 
-            # Create the task in the database, associating it with the Alexa device, room, and community
-            await create_task(db, task, alexa_device_id=alexa_device_id, community_id=community.id, room_id=room.id)
-            return {
-                "version": "1.0",
-                "response": {
-                    "outputSpeech": {
-                        "type": "PlainText",
-                        "text": f"Task '{task}' has been created and linked to the correct room and Alexa device."
-                    },
-                    "shouldEndSession": False
-                }
-            }
-        except Exception as e:
-            print(f"Error: {e}")
+            # Bump the device's usage counters in memory, they are flushed to alexa_devices in batches
+            request_counter.record_request(topology.alexa_device_id)
+
+            # Classify the request (micro-batched with concurrent requests) so urgent ones ("I fell")
+            # sort to the top. Without a model the utterance stays the title and the default priority is kept.
+            # The model is optional: if scoring fails the request is still turned into a task.
+            try:
+                prediction = await inference_batcher.score(task)
+            except Exception:
+                logger.exception("Request classifier failed, creating the task with the default priority")
+                prediction = None
+            title, description, priority_score = task, None, 1
+            if prediction:
+                title, description, priority_score = prediction.task_type, task, prediction.priority_score
+
+            # Create the task, associating it with the Alexa device, room, and community.
+            # With the write-behind queue running the INSERT happens after we answer Alexa.
+            task_fields = build_task_fields(
+                title,
+                alexa_device_id=topology.alexa_device_id,
+                community_id=topology.community_id,
+                room_id=topology.room_id,
+                description=description,
+                priority_score=priority_score
+            )
+            if not task_queue.enqueue(task_fields):
+                await create_task(
+                    db,
+                    title,
+                    alexa_device_id=topology.alexa_device_id,
+                    community_id=topology.community_id,
+                    room_id=topology.room_id,
+                    description=description,
+                    priority_score=priority_score
+                )
+            return speech_body(f"Task '{task}' has been created and linked to the correct room and Alexa device.")
+        except Exception:
+            logger.exception("Error creating task for device %s", device_id)
             raise HTTPException(status_code=500, detail="Error creating task")
     
-    return await default_response()
-
-async def default_response():
-    return {
-        "version": "1.0",
-        "response": {
-            "outputSpeech": {
-                "type": "PlainText",
-                "text": "I'm not sure what you mean. How can I assist you today?"
-            },
-            "shouldEndSession": False
-        }
-    }
+    return DEFAULT_RESPONSE
@@ -1,70 +1,68 @@
-from fastapi import APIRouter, Request, Depends, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
-from database_configs.db import get_db  # Use the correct path to your database module
-from crud.crud_task import create_task  # Import the task creation function
+import logging
+from fastapi import APIRouter, Request, HTTPException
+from pydantic import ValidationError
+from database_configs.db import SessionLocal  # Use the correct path to your database module
+from schemas.alexa import AlexaEnvelope
+from services import idempotency, rate_limiter
 from .help_response import handle_help_intent  # Import the help response
 from .device_registration import handle_register_device_intent  # Import device registration handler
+from .responses import AlexaResponse, LAUNCH_RESPONSE, DEFAULT_RESPONSE, THROTTLED_RESPONSE
 
 
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Intent name -> handler(envelope, db) returning the serialized response body.
+# Add new intents here; dispatch is a single dict lookup regardless of how many are registered.
+INTENT_HANDLERS = {
+    "RequestHelpIntent": handle_help_intent,  # Delegate to help_response.py
+    "RegisterDeviceIntent": handle_register_device_intent,
+}
+
+
 @router.post("/actions")  # This will be accessible at /alexa/actions
-async def alexa_actions(request: Request, db: AsyncSession = Depends(get_db)):
-    print('data json conversion')
-    data = await request.json()
-    
-    request_type = data['request']['type']
-    print("Request type:", request_type)
+async def alexa_actions(request: Request):
+    envelope = parse_envelope(await request.body())
+    request_type = envelope.request.type
+    logger.debug("Alexa request type: %s", request_type)
 
     if request_type == "LaunchRequest":
-        print('Handling LaunchRequest')
-        return await handle_launch_request()
+        return AlexaResponse(LAUNCH_RESPONSE)
     elif request_type == "IntentRequest":
-        print('Handling IntentRequest')
-        return await handle_intent_request(data, db)
+        # Alexa retries reuse the requestId, answer them with the response we already produced.
+        # A throttled answer isn't remembered, the retry gets another go once the bucket refills.
+        body = await idempotency.run_once(
+            envelope.request.requestId,
+            lambda: handle_intent_request(envelope),
+            cacheable=lambda body: body is not THROTTLED_RESPONSE,
+        )
+        return AlexaResponse(body)
     else:
-        print('Unhandled request type')
-        return await default_response()
-   
-
-async def handle_launch_request():
-    return {
-        "version": "1.0",
-        "response": {
-            "outputSpeech": {
-                "type": "PlainText",
-                "text": "How can I assist you today?"
-            },
-            "shouldEndSession": False
-        }
-    }
-
-async def handle_intent_request(data, db):
-    intent_name = data['request']['intent']['name']
-
-    if intent_name == "RequestHelpIntent":
-        return await handle_help_intent(data, db)  # Delegate to help_response.py
-    
-    elif intent_name == "RegisterDeviceIntent":
-        return await handle_register_device_intent(data, db)
-
-    return await default_response()
-
-    
-    
-
-async def default_response():
-    return {
-        "version": "1.0",
-        "response": {
-            "outputSpeech": {
-                "type": "PlainText",
-                "text": "I'm not sure what you mean. How can I assist you today?"
-            },
-            "shouldEndSession": False
-        }
-    }
+        logger.info("Unhandled Alexa request type: %s", request_type)
+        return AlexaResponse(DEFAULT_RESPONSE)
+
+
+def parse_envelope(body: bytes) -> AlexaEnvelope:
+    # Parse the raw body straight into the typed envelope (one pass, no intermediate dict)
+    try:
+        return AlexaEnvelope.model_validate_json(body)
+    except ValidationError:
+        raise HTTPException(status_code=400, detail="Invalid Alexa request envelope")
+
+
+async def handle_intent_request(envelope: AlexaEnvelope) -> bytes:
+    # Admission control runs before a DB session is opened, a throttled device gets a spoken answer
+    if not rate_limiter.admit(envelope.device_id):
+        return THROTTLED_RESPONSE
+
+    handler = INTENT_HANDLERS.get(envelope.intent_name)
+    if handler is None:
+        return DEFAULT_RESPONSE
+
+    # The session is only opened for intents that actually need the database
+    async with SessionLocal() as db:
+        return await handler(envelope, db)
 
 
 """
@@ -74,4 +72,4 @@ room: 1204
 
 PIN: MSTD4
 
-"""
\ No newline at end of file
+"""
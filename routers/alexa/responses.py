@@ -0,0 +1,27 @@
+import json
+from fastapi.responses import Response
+
+
+# Pre-serialized Alexa response bodies.
+# Every skill response has the same shape, so the JSON is assembled from constant byte fragments
+# around the (JSON-escaped) speech text instead of building and dumping a dict per request.
+
+_SPEECH_PREFIX = b'{"version":"1.0","response":{"outputSpeech":{"type":"PlainText","text":'
+_KEEP_SESSION_SUFFIX = b'},"shouldEndSession":false}}'
+_END_SESSION_SUFFIX = b'},"shouldEndSession":true}}'
+
+
+def speech_body(text: str, should_end_session: bool = False) -> bytes:
+    """Returns the serialized Alexa response that speaks `text`."""
+    suffix = _END_SESSION_SUFFIX if should_end_session else _KEEP_SESSION_SUFFIX
+    return _SPEECH_PREFIX + json.dumps(text).encode('utf-8') + suffix
+
+
+class AlexaResponse(Response):
+    media_type = "application/json"
+
+
+# Static responses, serialized once at import time
+LAUNCH_RESPONSE = speech_body("How can I assist you today?")
+DEFAULT_RESPONSE = speech_body("I'm not sure what you mean. How can I assist you today?")
+THROTTLED_RESPONSE = speech_body("I'm getting a lot of requests from this device right now. Please wait a moment and try again.")
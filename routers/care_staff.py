@@ -1,19 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from schemas.care_staff import CareStaffCreate, CareStaffUpdate, CareStaffResponse
-from models.models import User
+from auth.principal_cache import Principal  # The authenticated user, see get_current_user
 from crud.crud_care_staff import (
     get_care_staff_by_id,
     get_care_staff,
     create_care_staff,
     update_care_staff,
     delete_care_staff,
+    get_care_staff_for_community,
 )
-from database_configs.db import get_db  # Use the correct path to your database module
+from database_configs.db import get_db, get_read_db  # Use the correct path to your database module
 from auth.dependencies import get_current_user
-from sqlalchemy.future import select  # Import the select function for querying
+from routers.pagination import set_page_headers
+from routers.responses import list_response
+from schemas.adapters import care_staff_list_adapter
 
-CARE_STAFF_ROLE = 'care_staff'  # Ensure this role is added to the Enum in your models
 
 router = APIRouter()
 
@@ -22,7 +25,7 @@ router = APIRouter()
 async def create_new_care_staff(
     care_staff: CareStaffCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     # Check if the current user is a manager and belongs to a community
     if current_user.role != 'manager' or not current_user.community_id:
@@ -37,7 +40,7 @@ async def create_new_care_staff(
 
 # Route to get care staff by ID
 @router.get("/care_staff/{care_staff_id}", response_model=CareStaffResponse)
-async def read_care_staff(care_staff_id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def read_care_staff(care_staff_id: int, db: AsyncSession = Depends(get_read_db), current_user: Principal = Depends(get_current_user)):
     care_staff = await get_care_staff_by_id(db=db, user_id=care_staff_id)
     if not care_staff:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Care staff not found")
@@ -45,8 +48,18 @@ async def read_care_staff(care_staff_id: int, db: AsyncSession = Depends(get_db)
 
 # Route to get all care staff members with pagination
 @router.get("/care_staff/", response_model=list[CareStaffResponse])
-async def read_all_care_staff(skip: int = 0, limit: int = 10, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return await get_care_staff(db=db, skip=skip, limit=limit)
+async def read_all_care_staff(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = 10,  # Clamped to MAX_PAGE_SIZE, larger listings continue through X-Next-Cursor
+    cursor: Optional[str] = None,  # X-Next-Cursor from the previous page, replaces skip
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    page = await get_care_staff(db=db, skip=skip, limit=limit, cursor=cursor)
+    response = list_response(care_staff_list_adapter, page.items)
+    set_page_headers(request, response, page)
+    return response
 
 # Route to update care staff information
 @router.put("/care_staff/{care_staff_id}", response_model=CareStaffResponse)
@@ -54,7 +67,7 @@ async def update_care_staff_info(
     care_staff_id: int,
     care_staff_update: CareStaffUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     # Check if the current user is a manager
     if current_user.role != 'manager':
@@ -70,7 +83,7 @@ async def update_care_staff_info(
 async def delete_care_staff_info(
     care_staff_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     # Check if the current user is a manager
     if current_user.role != 'manager':
@@ -85,26 +98,22 @@ async def delete_care_staff_info(
 @router.get("/communities/{community_id}/care_staff/", response_model=list[CareStaffResponse])
 async def read_care_staff_by_community(
     community_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)  # Auth protected
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)  # Auth protected
 ):
     # No need to check if the user is associated with the community
-    stmt = select(User).filter(User.community_id == community_id, User.role == CARE_STAFF_ROLE)
-    result = await db.execute(stmt)
-    care_staff_list = result.scalars().all()
-    return care_staff_list
+    care_staff_list = await get_care_staff_for_community(db, community_id)
+    return list_response(care_staff_list_adapter, care_staff_list)
 
 
 @router.get("/my-community/care_staff/", response_model=list[CareStaffResponse])
 async def read_care_staff_for_user_community(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)  # Auth protected
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)  # Auth protected
 ):
     # Use the current user's community_id to get the staff
     if not current_user.community_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User is not associated with any community.")
 
-    stmt = select(User).filter(User.community_id == current_user.community_id, User.role == CARE_STAFF_ROLE)
-    result = await db.execute(stmt)
-    care_staff_list = result.scalars().all()
-    return care_staff_list
+    care_staff_list = await get_care_staff_for_community(db, current_user.community_id)
+    return list_response(care_staff_list_adapter, care_staff_list)
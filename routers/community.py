@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import logging
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-from database_configs.db import get_db  # Ensure this is the correct path to your DB config
-from models.models import Community, User  # Import the Community model
+from typing import List, Optional
+from database_configs.db import get_db, get_read_db  # Ensure this is the correct path to your DB config
+from models.models import Community  # Import the Community model
 from schemas.community import CommunityCreate, CommunityUpdate, CommunityResponse  # Import Community schemas
 from crud.crud_community import (
     create_community, 
@@ -12,7 +13,12 @@ from crud.crud_community import (
     delete_community
 )
 from auth.dependencies import get_current_user  # Import the authentication dependency
-from schemas.user import UserInDB  # Import the authenticated user model
+from auth.principal_cache import Principal  # The authenticated user, see get_current_user
+from routers.pagination import set_page_headers
+from routers.responses import list_response
+from schemas.adapters import community_list_adapter
+
+logger = logging.getLogger(__name__)
 
 # Initialize the router with auth dependency
 router = APIRouter(dependencies=[Depends(get_current_user)])
@@ -22,7 +28,7 @@ router = APIRouter(dependencies=[Depends(get_current_user)])
 async def create_new_community(
     community: CommunityCreate, 
     db: AsyncSession = Depends(get_db),
-    current_user: UserInDB = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     if not db or not current_user:
         raise HTTPException(status_code=400, detail="Invalid session or user context")
@@ -32,7 +38,7 @@ async def create_new_community(
 
 # Route to get a community by ID (auth required)
 @router.get("/communities/{community_id}", response_model=CommunityResponse)
-async def get_community(community_id: int, db: AsyncSession = Depends(get_db), current_user: UserInDB = Depends(get_current_user)):
+async def get_community(community_id: int, db: AsyncSession = Depends(get_read_db), current_user: Principal = Depends(get_current_user)):
     db_community = await get_community_by_id(db, community_id)
     if not db_community:
         raise HTTPException(status_code=404, detail="Community not found")
@@ -41,13 +47,17 @@ async def get_community(community_id: int, db: AsyncSession = Depends(get_db), c
 # Route to get a list of all communities (auth required)
 @router.get("/communities/", response_model=List[CommunityResponse])
 async def get_all_communities(
-    skip: int = 0, 
-    limit: int = 10, 
-    db: AsyncSession = Depends(get_db),
-    current_user: UserInDB = Depends(get_current_user)  # Authentication dependency
+    request: Request,
+    skip: int = Query(0, ge=0), 
+    limit: int = 10,  # Clamped to MAX_PAGE_SIZE, larger listings continue through X-Next-Cursor
+    cursor: Optional[str] = None,  # X-Next-Cursor from the previous page, replaces skip
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)  # Authentication dependency
 ):
-    communities = await get_communities(db, skip=skip, limit=limit)
-    return communities
+    page = await get_communities(db, skip=skip, limit=limit, cursor=cursor)
+    response = list_response(community_list_adapter, page.items)
+    set_page_headers(request, response, page)
+    return response
 
 # Route to update a community by ID (auth required)
 @router.put("/communities/{community_id}", response_model=CommunityResponse)
@@ -55,7 +65,7 @@ async def update_existing_community(
     community_id: int, 
     community: CommunityUpdate, 
     db: AsyncSession = Depends(get_db),
-    current_user: UserInDB = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     db_community = await get_community_by_id(db, community_id)
     if not db_community:
@@ -68,7 +78,7 @@ async def update_existing_community(
 async def delete_community_by_id(
     community_id: int, 
     db: AsyncSession = Depends(get_db),
-    current_user: UserInDB = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     db_community = await get_community_by_id(db, community_id)
     if not db_community:
@@ -79,8 +89,8 @@ async def delete_community_by_id(
 
 @router.get("/community/manager", response_model=CommunityResponse)
 async def get_manager_community(
-    db: AsyncSession = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db), 
+    current_user: Principal = Depends(get_current_user)
 ):
     # Check if the user is a manager
     if current_user.role != 'manager':
@@ -89,8 +99,7 @@ async def get_manager_community(
             detail="You are not authorized to access this resource."
         )
     
-    print('community id here')
-    print(current_user.community_id)
+    logger.debug("Fetching community %s for manager %s", current_user.community_id, current_user.id)
     # Fetch the community associated with this manager
     community = await db.get(Community, current_user.community_id)
     
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends
+from auth.principal_cache import Principal  # The authenticated user, see get_current_user
+from auth.dependencies import get_current_user  # Import the authentication dependency
+from auth import principal_cache
+from auth.utils import get_hashing_stats
+from database_configs.db import get_pool_stats, get_session_stats
+from services import device_cache, task_queue, request_counter, idempotency, rate_limiter, request_classifier, inference_batcher, pin_pool
+
+
+router = APIRouter()
+
+# Route to expose in-process cache / queue counters (auth required)
+@router.get("/metrics")
+async def get_metrics(current_user: Principal = Depends(get_current_user)):
+    return {
+        "device_cache": device_cache.get_stats(),
+        "task_queue": task_queue.get_stats(),
+        "device_request_counters": request_counter.get_stats(),
+        "alexa_idempotency": idempotency.get_stats(),
+        "alexa_rate_limiter": rate_limiter.get_stats(),
+        "request_classifier": request_classifier.get_stats(),
+        "classifier_batches": inference_batcher.get_stats(),
+        "community_pin_pool": pin_pool.get_stats(),
+        "principal_cache": principal_cache.get_stats(),
+        "password_hashing": get_hashing_stats(),
+        "database_pools": get_pool_stats(),
+        "database_sessions": get_session_stats(),
+    }
@@ -0,0 +1,12 @@
+from fastapi import Request, Response
+from crud.pagination import Page
+
+
+# Response headers for cursor-paginated list routes. The body stays a plain JSON list so existing
+# skip/limit clients keep working; the next page is advertised in X-Next-Cursor and a Link header.
+def set_page_headers(request: Request, response: Response, page: Page):
+    if page.next_cursor is None:
+        return
+    next_url = request.url.remove_query_params("skip").include_query_params(cursor=page.next_cursor)
+    response.headers["X-Next-Cursor"] = page.next_cursor
+    response.headers["Link"] = f'<{next_url}>; rel="next"'
@@ -0,0 +1,10 @@
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+# Serializes a list straight to JSON bytes with one of the adapters in schemas/adapters.py.
+# FastAPI skips its own response_model validation / encoding for a returned Response, so the
+# route decorator keeps response_model only for the OpenAPI schema.
+def list_response(adapter: TypeAdapter, items) -> Response:
+    body = adapter.dump_json(adapter.validate_python(items, from_attributes=True))
+    return Response(content=body, media_type="application/json")
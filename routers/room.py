@@ -1,12 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import csv
+import io
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession  # Using AsyncSession for async DB operations
 from typing import List
-from schemas.room import RoomCreate, RoomUpdate, RoomResponse, RoomAlexaStatusResponse  # Adjust paths as needed
-from models.models import User  # Import the User model for authentication
-from crud.crud_room import create_room, get_room_by_id, get_rooms_for_community, update_room, delete_room  # Adjust paths as needed
+from schemas.room import RoomCreate, RoomUpdate, RoomResponse, RoomAlexaStatusResponse, RoomImportError, RoomImportResponse  # Adjust paths as needed
+from auth.principal_cache import Principal  # The authenticated user, see get_current_user
+from crud.crud_room import create_room, get_room_by_id, get_rooms_for_community, get_room_alexa_status, update_room, delete_room, get_community_user_ids, upsert_rooms  # Adjust paths as needed
 from auth.dependencies import get_current_user  # Import the authentication dependency
-from database_configs.db import get_db  # Ensure this is the correct path to your DB config
-from schemas.alexadevice import AlexaDeviceResponse
+from database_configs.db import get_db, get_read_db  # Ensure this is the correct path to your DB config
+from routers.responses import list_response
+from schemas.adapters import room_list_adapter
+from config import ROOM_IMPORT_MAX_ROWS, ROOM_IMPORT_CHUNK_SIZE
 
 
 router = APIRouter()
@@ -16,33 +22,33 @@ router = APIRouter()
 async def create_new_room(
     room: RoomCreate, 
     db: AsyncSession = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     if not current_user.community_id:
         raise HTTPException(status_code=400, detail="User is not associated with any community")
 
     # Pass community_id as a separate argument to the CRUD function
     created_room = await create_room(db=db, room=room, community_id=current_user.community_id)
-    return RoomResponse.from_orm(created_room)
+    return RoomResponse.model_validate(created_room)
 
 # Route to get a room by its ID (auth required)
 @router.get("/rooms/{room_id}", response_model=RoomResponse)
-async def read_room(room_id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def read_room(room_id: int, db: AsyncSession = Depends(get_read_db), current_user: Principal = Depends(get_current_user)):
     db_room = await get_room_by_id(db, room_id=room_id)
     if db_room is None:
         raise HTTPException(status_code=404, detail="Room not found")
-    return RoomResponse.from_orm(db_room)
+    return RoomResponse.model_validate(db_room)
 
 # Route to get all rooms for the current user's community (auth required)
 @router.get("/communities/{community_id}/rooms", response_model=List[RoomResponse])
 async def read_rooms_for_community(
     community_id: int, 
-    db: AsyncSession = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db), 
+    current_user: Principal = Depends(get_current_user)
 ):
-    # Fetch all rooms for the specified community
+    # Fetch all rooms for the specified community (column rows, serialized in one adapter call)
     rooms = await get_rooms_for_community(db=db, community_id=community_id)
-    return [RoomResponse.from_orm(room) for room in rooms]
+    return list_response(room_list_adapter, rooms)
 
 # Route to update an existing room (auth required)
 @router.put("/rooms/{room_id}", response_model=RoomResponse)
@@ -50,7 +56,7 @@ async def update_existing_room(
     room_id: int, 
     room: RoomUpdate, 
     db: AsyncSession = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     # Fetch the room from the database
     db_room = await get_room_by_id(db=db, room_id=room_id)
@@ -62,15 +68,15 @@ async def update_existing_room(
         raise HTTPException(status_code=403, detail="Not authorized to update this room")
 
     # Update the room in the database
-    updated_room = await update_room(db=db, room_id=room_id, room_update=room)
-    return RoomResponse.from_orm(updated_room)
+    updated_room = await update_room(db=db, room_id=room_id, room=room)
+    return RoomResponse.model_validate(updated_room)
 
 # Route to delete a room (auth required)
 @router.delete("/rooms/{room_id}", response_model=RoomResponse)
 async def delete_existing_room(
     room_id: int, 
     db: AsyncSession = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     # Fetch the room from the database
     db_room = await get_room_by_id(db=db, room_id=room_id)
@@ -83,51 +89,107 @@ async def delete_existing_room(
 
     # Delete the room from the database
     deleted_room = await delete_room(db=db, room_id=room_id)
-    return RoomResponse.from_orm(deleted_room)
+    return RoomResponse.model_validate(deleted_room)
 
 @router.get("/my-community/rooms", response_model=List[RoomResponse])
 async def read_rooms_for_logged_in_user_community(
-    db: AsyncSession = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db), 
+    current_user: Principal = Depends(get_current_user)
 ):
-    # Fetch all rooms for the community associated with the logged-in user
+    # Fetch all rooms (and their alexa_devices) for the community associated with the logged-in user
     community_id = current_user.community_id
     rooms = await get_rooms_for_community(db=db, community_id=community_id)
-    # Manually convert each room and its alexa_devices
-    room_responses = []
-    for room in rooms:
-        alexa_devices_response = [AlexaDeviceResponse.from_orm(device) for device in room.alexa_devices]
-        
-        room_responses.append(RoomResponse(
-            id=room.id,
-            room_number=room.room_number,
-            community_id=room.community_id,
-            resident_id=room.resident_id,
-            floor_number=room.floor_number,
-            room_type=room.room_type,
-            alexa_devices=alexa_devices_response  # Convert the alexa devices here
-        ))
-
-    return room_responses
+    return list_response(room_list_adapter, rooms)
 
 
 @router.get("/rooms/{room_id}/alexa-status", response_model=RoomAlexaStatusResponse)
-async def check_alexa_device_status(room_id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
-    # Fetch the room by ID
-    db_room = await get_room_by_id(db, room_id=room_id)
+async def check_alexa_device_status(room_id: int, db: AsyncSession = Depends(get_read_db), current_user: Principal = Depends(get_current_user)):
+    # Fetch the room's community and whether any Alexa device is linked to it (one EXISTS query)
+    room_status = await get_room_alexa_status(db, room_id=room_id)
     
-    if not db_room:
+    if not room_status:
         raise HTTPException(status_code=404, detail="Room not found")
 
     # Ensure the room belongs to the current user's community
-    if db_room.community_id != current_user.community_id:
+    if room_status.community_id != current_user.community_id:
         raise HTTPException(status_code=403, detail="Not authorized to access this room")
 
-    # Check if there are any Alexa devices linked to the room
-    alexa_devices = db_room.alexa_devices
-    alexa_connected = bool(alexa_devices)  # True if there are Alexa devices linked
-
     return RoomAlexaStatusResponse(
-        room_id=db_room.id,
-        alexa_connected=alexa_connected
+        room_id=room_id,
+        alexa_connected=bool(room_status.alexa_connected)  # True if there are Alexa devices linked
     )
+
+
+def _parse_import_body(body: bytes, content_type: str) -> list:
+    # A JSON array of room objects, or CSV with a header row (room_number, resident_id, floor_number, room_type)
+    if content_type == "text/csv":
+        try:
+            reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+            if not reader.fieldnames or "room_number" not in reader.fieldnames:
+                raise HTTPException(status_code=400, detail="CSV needs a header row with a room_number column")
+            # Empty cells are missing values, not empty strings
+            return [{key: value.strip() or None for key, value in row.items() if key and value is not None} for row in reader]
+        except (UnicodeDecodeError, csv.Error):
+            raise HTTPException(status_code=400, detail="Malformed CSV")
+    if content_type == "application/json":
+        try:
+            rows = orjson.loads(body)
+        except orjson.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="Malformed JSON")
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of rooms")
+        return rows
+    raise HTTPException(status_code=415, detail="Send the rooms as text/csv or application/json")
+
+
+def _validation_detail(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in exc.errors())
+
+
+# Route to create or update many rooms of the caller's community at once (auth required).
+# Rooms are matched on room_number: new ones are created, existing ones get the imported
+# resident_id / floor_number / room_type. Only values that are given are applied: a missing column,
+# empty CSV cell or JSON null keeps what the room already has (unassign a resident with PUT /rooms/{room_id}).
+# Invalid rows are reported and skipped, the rest is imported.
+@router.post("/rooms/import", response_model=RoomImportResponse)
+async def import_rooms(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    if not current_user.community_id:
+        raise HTTPException(status_code=400, detail="User is not associated with any community")
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    rows = _parse_import_body(await request.body(), content_type)
+    if len(rows) > ROOM_IMPORT_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {ROOM_IMPORT_MAX_ROWS} rooms per import")
+
+    # Validate every row first; a room number may only appear once per import
+    rooms, row_numbers, errors, seen = [], [], [], set()
+    for number, row in enumerate(rows, start=1):
+        try:
+            room = RoomCreate.model_validate(row)
+        except ValidationError as exc:
+            errors.append(RoomImportError(row=number, detail=_validation_detail(exc)))
+            continue
+        if room.room_number in seen:
+            errors.append(RoomImportError(row=number, detail=f"Duplicate room_number {room.room_number!r} in this import"))
+            continue
+        seen.add(room.room_number)
+        rooms.append(room.model_dump())
+        row_numbers.append(number)
+
+    # Residents have to be users of the same community (one query for the whole import)
+    resident_ids = {room["resident_id"] for room in rooms if room["resident_id"] is not None}
+    known_residents = await get_community_user_ids(db, resident_ids, current_user.community_id)
+    valid_rooms = []
+    for number, room in zip(row_numbers, rooms):
+        if room["resident_id"] is not None and room["resident_id"] not in known_residents:
+            errors.append(RoomImportError(row=number, detail=f"resident_id {room['resident_id']} is not a user of this community"))
+        else:
+            valid_rooms.append(room)
+
+    created, updated = await upsert_rooms(db, current_user.community_id, valid_rooms, chunk_size=ROOM_IMPORT_CHUNK_SIZE)
+    errors.sort(key=lambda error: error.row)
+    return RoomImportResponse(created=created, updated=updated, rejected=len(errors), errors=errors)
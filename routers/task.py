@@ -1,23 +1,146 @@
-from fastapi import APIRouter, Depends, HTTPException
+import csv
+import io
+import logging
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-from database_configs.db import get_db  # Ensure this is the correct path to your DB config
-from models.models import Task  # Import the Task model
-from schemas.task import TaskResponse  # Import or create Task schema for response
+from typing import List, Optional, Literal
+from datetime import datetime
+from database_configs.db import get_db, get_read_db, ReadSessionLocal  # Ensure this is the correct path to your DB config
+from schemas.task import TaskResponse, TaskBulkCreate, TaskBulkCreateResponse  # Import or create Task schema for response
+from crud.crud_task import create_tasks_bulk, get_tasks, stream_task_rows, get_ids_outside_community, TASK_EXPORT_COLUMNS
+from models.models import Room, AlexaDevice
 from auth.dependencies import get_current_user  # Import the authentication dependency
-from schemas.user import UserInDB  # Import the authenticated user model
-from sqlalchemy.future import select  # Import the select function for querying
+from auth.principal_cache import Principal  # The authenticated user, see get_current_user
+from routers.pagination import set_page_headers
+from routers.responses import list_response
+from schemas.adapters import task_list_adapter
+from config import TASK_EXPORT_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 @router.get("/tasks/", response_model=List[TaskResponse])
 async def get_all_tasks(
-    skip: int = 0,
-    limit: int = 10,
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = 10,  # Clamped to MAX_PAGE_SIZE, larger listings continue through X-Next-Cursor
+    cursor: Optional[str] = None,  # X-Next-Cursor from the previous page, replaces skip
+    community_id: Optional[int] = None,  # Must be the caller's community, which is also the default
+    room_id: Optional[int] = None,
+    status: Optional[List[Literal['pending', 'in_progress', 'completed']]] = Query(None),  # ?status=pending&status=in_progress
+    min_priority: Optional[int] = None,
+    max_priority: Optional[int] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    order_by: Literal['id', 'priority', 'created_at'] = 'id',  # priority: most urgent first, created_at: newest first
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)  # Authentication dependency
+):
+    # Staff only ever see tasks from their own community
+    if not current_user.community_id:
+        raise HTTPException(status_code=400, detail="User is not associated with any community")
+    if community_id is not None and community_id != current_user.community_id:
+        raise HTTPException(status_code=403, detail="Not authorized to view tasks for this community")
+
+    # Keyset pagination on the chosen ordering (skip still works as an offset)
+    page = await get_tasks(
+        db,
+        community_id=current_user.community_id,
+        room_id=room_id,
+        statuses=status,
+        min_priority=min_priority,
+        max_priority=max_priority,
+        created_after=created_after,
+        created_before=created_before,
+        order_by=order_by,
+        cursor=cursor,
+        skip=skip,
+        limit=limit,
+    )
+    response = list_response(task_list_adapter, page.items)
+    set_page_headers(request, response, page)
+    return response
+
+
+# Route to create many tasks in a single INSERT (auth required)
+@router.post("/tasks/batch", response_model=TaskBulkCreateResponse, status_code=status.HTTP_201_CREATED)
+async def create_tasks_batch(
+    payload: TaskBulkCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: UserInDB = Depends(get_current_user)  # Authentication dependency
+    current_user: Principal = Depends(get_current_user)  # Authentication dependency
+):
+    if not current_user.community_id:
+        raise HTTPException(status_code=400, detail="User is not associated with any community")
+
+    # Tasks can only be created in the caller's own community
+    rows = []
+    for task in payload.tasks:
+        if task.community_id is not None and task.community_id != current_user.community_id:
+            raise HTTPException(status_code=403, detail="Not authorized to create tasks for this community")
+        rows.append({**task.model_dump(), "community_id": current_user.community_id})
+
+    # ...and may only point at that community's rooms and devices
+    room_ids = {row["room_id"] for row in rows if row["room_id"] is not None}
+    device_ids = {row["alexa_device_id"] for row in rows if row["alexa_device_id"] is not None}
+    if await get_ids_outside_community(db, Room, room_ids, current_user.community_id):
+        raise HTTPException(status_code=403, detail="Not authorized to create tasks for rooms outside your community")
+    if await get_ids_outside_community(db, AlexaDevice, device_ids, current_user.community_id):
+        raise HTTPException(status_code=403, detail="Not authorized to create tasks for Alexa devices outside your community")
+
+    task_ids = await create_tasks_bulk(db, rows)
+    return TaskBulkCreateResponse(ids=task_ids, count=len(task_ids))
+
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _ndjson_chunk(rows) -> bytes:
+    return b"".join(orjson.dumps(row._asdict()) + b"\n" for row in rows)
+
+
+def _csv_chunk(rows) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([value.isoformat() if isinstance(value, datetime) else value for value in row] for row in rows)
+    return buffer.getvalue().encode()
+
+
+async def _export_chunks(community_id: int, created_after: Optional[datetime], created_before: Optional[datetime], format: str):
+    # The body is sent after the route's dependencies are cleaned up, so the export opens its own
+    # session for as long as it streams (closed on completion or when the client disconnects)
+    encode = _csv_chunk if format == "csv" else _ndjson_chunk
+    exported = 0
+    async with ReadSessionLocal() as db:
+        if format == "csv":
+            yield _csv_chunk([[column.key for column in TASK_EXPORT_COLUMNS]])
+        async for rows in stream_task_rows(db, community_id, created_after, created_before, batch_size=TASK_EXPORT_BATCH_SIZE):
+            exported += len(rows)
+            yield encode(rows)
+    logger.info("Exported %d tasks for community %s as %s", exported, community_id, format)
+
+
+# Full task history of the caller's community, streamed as NDJSON (one task per line) or CSV
+@router.get("/tasks/export")
+async def export_tasks(
+    format: Literal['ndjson', 'csv'] = 'ndjson',
+    community_id: Optional[int] = None,  # Must be the caller's community, which is also the default
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    current_user: Principal = Depends(get_current_user)  # Authentication dependency
 ):
-    # Query all tasks with pagination
-    result = await db.execute(select(Task).offset(skip).limit(limit))
-    tasks = result.scalars().all()
-    return tasks
\ No newline at end of file
+    if not current_user.community_id:
+        raise HTTPException(status_code=400, detail="User is not associated with any community")
+    if community_id is not None and community_id != current_user.community_id:
+        raise HTTPException(status_code=403, detail="Not authorized to export tasks for this community")
+    if created_after is not None and created_before is not None and created_after >= created_before:
+        raise HTTPException(status_code=400, detail="created_after must be before created_before")
+
+    filename = f"tasks-community-{current_user.community_id}.{format}"
+    return StreamingResponse(
+        _export_chunks(current_user.community_id, created_after, created_before, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
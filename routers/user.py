@@ -1,19 +1,27 @@
 # routers/user.py
-from fastapi import APIRouter, Depends, HTTPException, Security, Form
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Security, Form, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession  # Use AsyncSession instead of Session
-from typing import List
+from typing import List, Optional
 from datetime import timedelta
 
-from database_configs.db import get_db  # Ensure this returns AsyncSession
-from schemas.user import UserCreate, UserUpdate, UserInDB, UserResponse, UserLogin, OAuth2Login
+from database_configs.db import get_db, get_read_db  # Ensure this returns AsyncSession
+from schemas.user import UserCreate, UserUpdate, UserResponse, UserLogin, OAuth2Login, RefreshTokenRequest
 from crud.crud_user import get_user, get_users, create_user, update_user, delete_user, get_user_by_email
+from crud.crud_refresh_token import create_refresh_token, rotate_refresh_token, revoke_refresh_token
 from auth.jwt import create_access_token  # Assuming you have a JWT utility module
 from config import ACCESS_TOKEN_EXPIRE_MINUTES  # JWT expiration setting
-from auth.utils import get_password_hash, verify_password  # Import the bcrypt utility functions
+from auth.utils import hash_password_async, verify_password_async, needs_rehash  # Import the bcrypt utility functions
 from auth.dependencies import get_current_user  # Import the authentication dependency
+from auth.principal_cache import Principal  # The authenticated user, see get_current_user
+from routers.pagination import set_page_headers
+from routers.responses import list_response
+from schemas.adapters import user_list_adapter
 
 
 
+logger = logging.getLogger(__name__)
+
 #router = APIRouter(dependencies=[Depends(get_current_user)])
 router = APIRouter()
 
@@ -21,13 +29,22 @@ router = APIRouter()
 
 # Asynchronous route handler for reading all users
 @router.get("/users/", response_model=List[UserResponse])
-async def read_users(skip: int = 0, limit: int = 10, db: AsyncSession = Depends(get_db), current_user: UserInDB = Depends(get_current_user)):
-    users = await get_users(db, skip=skip, limit=limit)  # Await the async function
-    return users
+async def read_users(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = 10,  # Clamped to MAX_PAGE_SIZE, larger listings continue through X-Next-Cursor
+    cursor: Optional[str] = None,  # X-Next-Cursor from the previous page, replaces skip
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    page = await get_users(db, skip=skip, limit=limit, cursor=cursor)  # Await the async function
+    response = list_response(user_list_adapter, page.items)
+    set_page_headers(request, response, page)
+    return response
 
 # Asynchronous route handler for reading a specific user by ID
 @router.get("/users/{user_id}", response_model=UserResponse)
-async def read_user(user_id: int, db: AsyncSession = Depends(get_db), current_user: UserInDB = Depends(get_current_user)):
+async def read_user(user_id: int, db: AsyncSession = Depends(get_read_db), current_user: Principal = Depends(get_current_user)):
     db_user = await get_user(db, user_id=user_id)  # Await the async function
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
@@ -35,32 +52,32 @@ async def read_user(user_id: int, db: AsyncSession = Depends(get_db), current_us
 
 # Asynchronous route handler for creating a new user
 @router.post("/users/", response_model=UserResponse)
-async def create_new_user(user: UserCreate, db: AsyncSession = Depends(get_db), current_user: UserInDB = Depends(get_current_user)):
+async def create_new_user(user: UserCreate, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     db_user = await get_user_by_email(db, email=user.email)  # Await the async function
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Hash the password using the utility function from auth/utils.py
-    user.password = get_password_hash(user.password)
+    user.password = await hash_password_async(user.password)
     
     created_user = await create_user(db=db, user=user)  # Await the async function
-    return UserResponse.from_orm(created_user)  # Return a UserResponse model
+    return UserResponse.model_validate(created_user)  # Return a UserResponse model
 
 # Asynchronous route handler for updating an existing user
 @router.put("/users/{user_id}", response_model=UserResponse)
-async def update_existing_user(user_id: int, user: UserUpdate, db: AsyncSession = Depends(get_db), current_user: UserInDB = Depends(get_current_user)):
+async def update_existing_user(user_id: int, user: UserUpdate, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     updated_user = await update_user(db=db, user_id=user_id, user_update=user)  # Await the async function
     if updated_user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return UserResponse.from_orm(updated_user)  # Return a UserResponse model
+    return UserResponse.model_validate(updated_user)  # Return a UserResponse model
 
 # Asynchronous route handler for deleting an existing user
 @router.delete("/users/{user_id}", response_model=UserResponse)
-async def delete_existing_user(user_id: int, db: AsyncSession = Depends(get_db), current_user: UserInDB = Depends(get_current_user)):
+async def delete_existing_user(user_id: int, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     deleted_user = await delete_user(db=db, user_id=user_id)  # Await the async function
     if deleted_user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return UserResponse.from_orm(deleted_user)  # Return a UserResponse model
+    return UserResponse.model_validate(deleted_user)  # Return a UserResponse model
 
 # Asynchronous registration route handler
 @router.post("/register", response_model=UserResponse)
@@ -70,39 +87,28 @@ async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Email already registered")
     
      # Hash the password using the utility function from auth/utils.py
-    plain_password = user.password  # Store the plain password for debugging
-    hashed_password = get_password_hash(plain_password)
-    
-    # Debugging: Print the plain password and hashed password
-    print(f"Plain Password: {plain_password}")  # This will print the user's entered plain password
-    print(f"Hashed Password: {hashed_password}")  # This will print the hashed password
+    hashed_password = await hash_password_async(user.password)
 
     # Update the user object with the hashed password
     user.password = hashed_password
 
     created_user = await create_user(db=db, user=user)  # Await the async function
-    return UserResponse.from_orm(created_user)  # Return a UserResponse model
+    logger.info("Registered user %s", created_user.id)
+    return UserResponse.model_validate(created_user)  # Return a UserResponse model
 
 # Asynchronous login route handler
 @router.post("/login")
 async def login_user(user: UserLogin, db: AsyncSession = Depends(get_db)):
-    print('does it hit?')
     db_user = await get_user_by_email(db, email=user.email)  # Await the async function
-    if db_user:
-        print(f"Entered Password: {user.password}")  # Debugging
-        print(f"Stored Hashed Password: {db_user.hashed_password}")  # Debugging
     
     # Check if the user exists and the password is correct using the utility function
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
-        print("Password verification failed")  # Debugging
+    if not db_user or not await verify_password_async(user.password, db_user.hashed_password):
+        logger.info("Failed login for user %s", db_user.id if db_user else "unknown")  # No email addresses in the logs
         raise HTTPException(status_code=400, detail="Incorrect email or password")
+    await rehash_password_if_needed(db, db_user, user.password)
     
-    # Create a JWT token for the user
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": db_user.email}, expires_delta=access_token_expires
-    )
-    return {"access_token": access_token, "token_type": "bearer"}
+    # Create a JWT token (and a refresh token) for the user
+    return await issue_tokens(db, email=db_user.email, user_id=db_user.id)
 
 
 @router.post("/oauth2-login")
@@ -112,14 +118,49 @@ async def oauth2_login(
     db: AsyncSession = Depends(get_db)
 ):
     db_user = await get_user_by_email(db, email=username)  # Use username as email
-    if not db_user or not verify_password(password, db_user.hashed_password):
+    if not db_user or not await verify_password_async(password, db_user.hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect email or password")
+    await rehash_password_if_needed(db, db_user, password)
+
+    return await issue_tokens(db, email=db_user.email, user_id=db_user.id)
+
 
+# Exchange a refresh token for a new access token; the refresh token is rotated on every use
+@router.post("/token/refresh")
+async def refresh_access_token(body: RefreshTokenRequest, db: AsyncSession = Depends(get_db)):
+    rotated = await rotate_refresh_token(db, body.refresh_token)
+    if not rotated:
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+    refresh_token, email = rotated
+
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(data={"sub": email}, expires_delta=access_token_expires)
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+
+# Revoke a refresh token (the access token simply expires)
+@router.post("/logout")
+async def logout_user(body: RefreshTokenRequest, db: AsyncSession = Depends(get_db)):
+    await revoke_refresh_token(db, body.refresh_token)
+    return {"detail": "Logged out"}
+
+
+# Access token + refresh token returned by the login endpoints
+async def issue_tokens(db: AsyncSession, email: str, user_id: int):
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": db_user.email}, expires_delta=access_token_expires
+        data={"sub": email}, expires_delta=access_token_expires
     )
-    return {"access_token": access_token, "token_type": "bearer"}
+    refresh_token = await create_refresh_token(db, user_id)
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+
+# Upgrade a stored hash to the current BCRYPT_ROUNDS after a successful login (we only see the plain password here)
+async def rehash_password_if_needed(db: AsyncSession, db_user, plain_password: str):
+    if needs_rehash(db_user.hashed_password):
+        db_user.hashed_password = await hash_password_async(plain_password)
+        await db.commit()
+        await db.refresh(db_user)
 
 
 '''
@@ -0,0 +1,19 @@
+from typing import List
+from pydantic import TypeAdapter
+from schemas.task import TaskResponse
+from schemas.user import UserResponse
+from schemas.community import CommunityResponse
+from schemas.care_staff import CareStaffResponse
+from schemas.room import RoomResponse
+from schemas.alexadevice import AlexaDeviceResponse
+
+
+# Prebuilt TypeAdapters for the list responses. Building an adapter compiles its validator and
+# serializer, so it is done once at import; list routes validate their rows (ORM objects or column
+# rows, from attributes) and dump JSON bytes in a single pydantic-core call.
+task_list_adapter = TypeAdapter(List[TaskResponse])
+user_list_adapter = TypeAdapter(List[UserResponse])
+community_list_adapter = TypeAdapter(List[CommunityResponse])
+care_staff_list_adapter = TypeAdapter(List[CareStaffResponse])
+room_list_adapter = TypeAdapter(List[RoomResponse])
+alexa_device_list_adapter = TypeAdapter(List[AlexaDeviceResponse])
@@ -0,0 +1,49 @@
+from pydantic import BaseModel
+from typing import Optional, Dict
+
+
+# Compact typed view of the Alexa request envelope.
+# Only the fields the skill reads are declared; everything else in the envelope is ignored while parsing.
+
+class AlexaSlot(BaseModel):
+    name: Optional[str] = None
+    value: Optional[str] = None
+
+class AlexaIntent(BaseModel):
+    name: str
+    slots: Dict[str, AlexaSlot] = {}
+
+class AlexaRequest(BaseModel):
+    type: str
+    requestId: Optional[str] = None
+    intent: Optional[AlexaIntent] = None
+
+class AlexaDeviceInfo(BaseModel):
+    deviceId: Optional[str] = None
+
+class AlexaSystem(BaseModel):
+    device: Optional[AlexaDeviceInfo] = None
+
+class AlexaContext(BaseModel):
+    System: Optional[AlexaSystem] = None
+
+class AlexaEnvelope(BaseModel):
+    version: Optional[str] = None
+    context: Optional[AlexaContext] = None
+    request: AlexaRequest
+
+    @property
+    def device_id(self) -> Optional[str]:
+        system = self.context.System if self.context else None
+        return system.device.deviceId if system and system.device else None
+
+    @property
+    def intent_name(self) -> Optional[str]:
+        return self.request.intent.name if self.request.intent else None
+
+    def slot_value(self, slot_name: str) -> Optional[str]:
+        """Returns the spoken value of a slot, or None if the slot is missing or empty."""
+        if not self.request.intent:
+            return None
+        slot = self.request.intent.slots.get(slot_name)
+        return slot.value if slot else None
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 from datetime import datetime
 
@@ -30,8 +30,7 @@ class RoomResponse(BaseModel):
     floor_number: Optional[int] = None
     room_type: Optional[str] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Community schema for response
 class CommunityResponse(BaseModel):
@@ -39,8 +38,7 @@ class CommunityResponse(BaseModel):
     name: str
     address: str
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Schema for Response
 class AlexaDeviceResponse(AlexaDeviceBase):
@@ -49,7 +47,5 @@ class AlexaDeviceResponse(AlexaDeviceBase):
     community_id: Optional[int] = None  # Include community_id directly
 
 
-    class Config:
-        orm_mode = True
-        from_attributes = True  # Add this line to allow ORM mapping
+    model_config = ConfigDict(from_attributes=True)
 
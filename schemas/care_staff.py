@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, ConfigDict
 from typing import Optional
 from datetime import datetime
 
@@ -24,8 +24,7 @@ class CommunityResponse(BaseModel):
     created_at: datetime
     created_by_id: int  # Include creator ID
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class CareStaffResponse(BaseModel):
     id: int
@@ -37,5 +36,4 @@ class CareStaffResponse(BaseModel):
     community: Optional[CommunityResponse]  # Include community details
 
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
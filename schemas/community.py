@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr,Field 
+from pydantic import BaseModel, EmailStr, Field, ConfigDict
 from typing import Optional
 from datetime import datetime
 
@@ -28,5 +28,4 @@ class CommunityResponse(BaseModel):
     created_at: datetime
     created_by_id: int  # Include creator ID
 
-    class Config:
-        orm_mode = True  # This will allow reading from ORM models
+    model_config = ConfigDict(from_attributes=True)
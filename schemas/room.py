@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, List
 from schemas.alexadevice import AlexaDeviceResponse  # Import the correct AlexaDevice schema
 
@@ -10,8 +10,7 @@ class RoomCreate(BaseModel):
     floor_number: Optional[int] = None
     room_type: Optional[str] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Schema for updating an existing room
 class RoomUpdate(BaseModel):
@@ -20,8 +19,7 @@ class RoomUpdate(BaseModel):
     floor_number: Optional[int] = None
     room_type: Optional[str] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Schema for returning room data in responses
 class RoomResponse(BaseModel):
@@ -33,14 +31,22 @@ class RoomResponse(BaseModel):
     room_type: Optional[str] = None
     alexa_devices: List[AlexaDeviceResponse] = []  # Change to a list of AlexaDeviceResponse objects
 
-    class Config:
-        orm_mode = True
-        from_attributes = True  # Add this line to allow ORM mapping
+    model_config = ConfigDict(from_attributes=True)
 
 class RoomAlexaStatusResponse(BaseModel):
     room_id: int
     alexa_connected: bool  # True if Alexa devices are linked
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
+# A row of a bulk room import that was not imported (row is 1-based, CSV header excluded)
+class RoomImportError(BaseModel):
+    row: int
+    detail: str
+
+# Result of a bulk room import
+class RoomImportResponse(BaseModel):
+    created: int
+    updated: int
+    rejected: int
+    errors: List[RoomImportError] = []
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, ConfigDict
+from typing import Optional, List, Literal
 from datetime import datetime
 
 class TaskResponse(BaseModel):
@@ -13,5 +13,23 @@ class TaskResponse(BaseModel):
     room_id: Optional[int] = None  # Add room ID (optional in case the task isn't associated with a room)
     alexa_device_id: Optional[int] = None  # Add Alexa device ID (optional in case the task isn't associated with an Alexa device)
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Schema for a single task in a batch insert
+class TaskCreate(BaseModel):
+    title: str
+    description: Optional[str] = None
+    status: Literal['pending', 'in_progress', 'completed'] = 'pending'
+    priority_score: int = 1
+    community_id: Optional[int] = None  # Defaults to the caller's community
+    room_id: Optional[int] = None
+    alexa_device_id: Optional[int] = None
+
+# Schema for creating many tasks in one request (device backlog replay, load test seeding)
+class TaskBulkCreate(BaseModel):
+    tasks: List[TaskCreate] = Field(..., min_length=1, max_length=5000)
+
+class TaskBulkCreateResponse(BaseModel):
+    ids: List[int]
+    count: int
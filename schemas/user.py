@@ -1,5 +1,5 @@
 # schemas/user.py
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import BaseModel, EmailStr, Field, field_validator, ConfigDict
 from typing import Optional
 import re  # Add this line to import the 're' module
 
@@ -25,7 +25,8 @@ class UserCreate(UserBase):
         description="Password must be between 8 and 100 characters, and contain at least one uppercase letter, one lowercase letter, one number, and one special character"
     )
 
-    @validator('password')
+    @field_validator('password')
+    @classmethod
     def validate_password(cls, value):
         # Regular expression for password validation
         if not re.match(r'^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&])[A-Za-z\d@$!%*?&]{8,}$', value):
@@ -49,8 +50,7 @@ class UserInDB(UserBase):
     id: int
     hashed_password: str  # Use 'password' to match database field
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Define a separate model for response without password
 class UserResponse(BaseModel):
@@ -59,9 +59,7 @@ class UserResponse(BaseModel):
     email: EmailStr
     role: str
 
-    class Config:
-        orm_mode = True
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class UserLogin(BaseModel):
     """Schema for user login"""
@@ -74,3 +72,6 @@ class OAuth2Login(BaseModel):
     password: str
 
 
+class RefreshTokenRequest(BaseModel):
+    """Schema for exchanging or revoking a refresh token"""
+    refresh_token: str
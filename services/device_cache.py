@@ -0,0 +1,77 @@
+from typing import NamedTuple, Optional
+from cachetools import TTLCache
+from config import DEVICE_CACHE_MAX_SIZE, DEVICE_CACHE_TTL_SECONDS
+
+
+# Everything the help intent needs to know about a device to create a task
+class DeviceTopology(NamedTuple):
+    room_id: int
+    community_id: int
+    alexa_device_id: int  # Primary key of the AlexaDevice row (not the Amazon device_id string)
+
+
+# Bounded, TTL'd map of Amazon device_id -> DeviceTopology.
+# The cache is per process, so the TTL bounds how long another worker can serve a stale entry.
+_cache: TTLCache = TTLCache(maxsize=DEVICE_CACHE_MAX_SIZE, ttl=DEVICE_CACHE_TTL_SECONDS)
+
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def get(device_id: str) -> Optional[DeviceTopology]:
+    """Returns the cached topology for a device, or None on a miss."""
+    topology = _cache.get(device_id)
+    if topology is None:
+        _stats["misses"] += 1
+    else:
+        _stats["hits"] += 1
+    return topology
+
+
+def peek(device_id: str) -> Optional[DeviceTopology]:
+    """Returns the cached topology without touching the hit/miss counters."""
+    return _cache.get(device_id)
+
+
+def put(device_id: str, topology: DeviceTopology):
+    _cache[device_id] = topology
+
+
+def invalidate(device_id: str):
+    """Drops a single device from the cache."""
+    if _cache.pop(device_id, None) is not None:
+        _stats["invalidations"] += 1
+
+
+def invalidate_room(room_id: int):
+    """Drops every cached device that belongs to the given room."""
+    invalidate_rooms([room_id])
+
+
+def invalidate_rooms(room_ids):
+    """Drops every cached device that belongs to any of the given rooms (one pass over the cache)."""
+    room_ids = set(room_ids)
+    if not room_ids:
+        return
+    stale = [device_id for device_id, topology in list(_cache.items()) if topology.room_id in room_ids]
+    for device_id in stale:
+        invalidate(device_id)
+
+
+def invalidate_community(community_id: int):
+    """Drops every cached device that belongs to the given community (one pass over the cache)."""
+    stale = [device_id for device_id, topology in list(_cache.items()) if topology.community_id == community_id]
+    for device_id in stale:
+        invalidate(device_id)
+
+
+def clear():
+    _cache.clear()
+
+
+def get_stats() -> dict:
+    return {
+        **_stats,
+        "size": len(_cache),
+        "max_size": _cache.maxsize,
+        "ttl_seconds": _cache.ttl,
+    }
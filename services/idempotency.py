@@ -0,0 +1,70 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+from cachetools import TTLCache
+from config import IDEMPOTENCY_CACHE_MAX_SIZE, IDEMPOTENCY_CACHE_TTL_SECONDS
+
+
+# Bounded LRU (with TTL) of Alexa requestId -> serialized response body.
+# Alexa retries a request when we answer slowly; a retry with the same requestId gets the response
+# that was already produced instead of running the handler (and creating the task) again.
+_responses: TTLCache = TTLCache(maxsize=IDEMPOTENCY_CACHE_MAX_SIZE, ttl=IDEMPOTENCY_CACHE_TTL_SECONDS)
+
+# requestId -> future of a response that is still being produced, so a retry that arrives
+# while the original is in flight waits for it instead of racing it
+_inflight: dict = {}
+
+_stats = {"hits": 0, "misses": 0, "inflight_joins": 0}
+
+
+async def run_once(request_id: Optional[str], produce: Callable[[], Awaitable[bytes]],
+                   cacheable: Callable[[bytes], bool] = lambda body: True) -> bytes:
+    """Returns the response for `request_id`, calling `produce` only the first time it is seen.
+
+    Bodies for which `cacheable` returns False (e.g. a throttled answer) are handed to the callers
+    waiting on this request but not remembered, so the next retry runs `produce` again.
+    """
+    if not request_id:
+        return await produce()
+
+    cached = _responses.get(request_id)
+    if cached is not None:
+        _stats["hits"] += 1
+        return cached
+
+    pending = _inflight.get(request_id)
+    if pending is not None:
+        _stats["inflight_joins"] += 1
+        return await asyncio.shield(pending)
+
+    _stats["misses"] += 1
+    future = asyncio.get_running_loop().create_future()
+    _inflight[request_id] = future
+    try:
+        body = await produce()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        # Failures are not cached, the next retry runs the handler again
+        future.set_exception(e)
+        future.exception()  # Mark as retrieved when nobody is waiting on it
+        raise
+    finally:
+        _inflight.pop(request_id, None)
+
+    if cacheable(body):
+        _responses[request_id] = body
+    future.set_result(body)
+    return body
+
+
+def get_stats() -> dict:
+    lookups = _stats["hits"] + _stats["misses"]
+    return {
+        **_stats,
+        "hit_rate": _stats["hits"] / lookups if lookups else 0.0,
+        "size": len(_responses),
+        "inflight": len(_inflight),
+        "max_size": _responses.maxsize,
+        "ttl_seconds": _responses.ttl,
+    }
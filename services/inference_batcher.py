@@ -0,0 +1,98 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+from services import request_classifier
+from services.request_classifier import Prediction
+from config import CLASSIFIER_BATCH_MAX_SIZE, CLASSIFIER_BATCH_MAX_WAIT_MS
+
+logger = logging.getLogger(__name__)
+
+
+# Asyncio micro-batcher: collects items for up to `max_batch_size` items or `max_wait_ms`,
+# runs one batched predict call and resolves each caller's future with its own result.
+# A failed batch resolves every future with None ("no prediction") rather than raising in each caller.
+
+class MicroBatcher:
+    def __init__(self, predict_batch: Callable[[list], Awaitable[list]], max_batch_size: int, max_wait_ms: float):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_ms / 1000
+        self._pending = []  # (item, future) waiting for the next batch
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight = set()  # Running batch tasks, kept referenced until they finish
+        # Batch size histogram, bucket key is the smallest power of two >= the batch size
+        self.histogram = {}
+        self.batches = 0
+        self.items = 0
+        self.failed_batches = 0
+
+    async def submit(self, item):
+        """Queues `item` for the next batch and returns its prediction."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_seconds, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _run(self, batch):
+        self._record(len(batch))
+        try:
+            results = await self.predict_batch([item for item, _ in batch])
+        except Exception:
+            logger.exception("Batched predict failed for %d items", len(batch))
+            self.failed_batches += 1
+            results = [None] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _record(self, size: int):
+        bucket = 1
+        while bucket < size:
+            bucket *= 2
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+        self.batches += 1
+        self.items += size
+
+    def get_stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "failed_batches": self.failed_batches,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "batch_size_histogram": {f"<={bucket}": count for bucket, count in sorted(self.histogram.items())},
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_seconds * 1000,
+        }
+
+
+_utterance_batcher = MicroBatcher(
+    request_classifier.predict_batch_async,
+    max_batch_size=CLASSIFIER_BATCH_MAX_SIZE,
+    max_wait_ms=CLASSIFIER_BATCH_MAX_WAIT_MS,
+)
+
+
+async def score(utterance: str) -> Optional[Prediction]:
+    """Classifies an utterance as part of a micro-batch, or returns None when no model is loaded (or the scoring pool isn't running)."""
+    if not request_classifier.is_running():
+        return None
+    return await _utterance_batcher.submit(utterance)
+
+
+def get_stats() -> dict:
+    return _utterance_batcher.get_stats()
@@ -0,0 +1,52 @@
+import secrets
+import string
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from models.models import Community
+from config import PIN_POOL_BATCH_SIZE, PIN_POOL_MAX_ROUNDS
+
+
+PIN_ALPHABET = string.ascii_uppercase + string.digits
+PIN_LENGTH = 5
+
+# Pre-validated, currently unused PINs. A refill checks a whole batch of random candidates with one
+# SELECT ... WHERE pin_code IN (...), so allocating a PIN costs at most PIN_POOL_MAX_ROUNDS queries
+# (and usually none, while the pool has PINs left).
+_pool: list = []
+
+_stats = {"allocated": 0, "refills": 0, "refill_queries": 0, "candidates": 0, "collisions": 0}
+
+
+def _random_pin() -> str:
+    return ''.join(secrets.choice(PIN_ALPHABET) for _ in range(PIN_LENGTH))
+
+
+async def _refill(db: AsyncSession):
+    _stats["refills"] += 1
+    for _ in range(PIN_POOL_MAX_ROUNDS):
+        candidates = {_random_pin() for _ in range(PIN_POOL_BATCH_SIZE)}
+        result = await db.execute(select(Community.pin_code).filter(Community.pin_code.in_(candidates)))
+        taken = set(result.scalars().all())
+        _stats["refill_queries"] += 1
+        _stats["candidates"] += len(candidates)
+        _stats["collisions"] += len(taken)
+        _pool.extend(candidates - taken)
+        if _pool:
+            return
+    raise RuntimeError("Could not find an unused community PIN")
+
+
+async def allocate_pin(db: AsyncSession) -> str:
+    """Returns a PIN that was unused when it was validated."""
+    if not _pool:
+        await _refill(db)
+    _stats["allocated"] += 1
+    return _pool.pop()
+
+
+def get_stats() -> dict:
+    return {
+        **_stats,
+        "pool_size": len(_pool),
+        "collision_rate": _stats["collisions"] / _stats["candidates"] if _stats["candidates"] else 0.0,
+    }
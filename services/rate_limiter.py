@@ -0,0 +1,70 @@
+import time
+from typing import Optional
+from cachetools import LRUCache
+from services import device_cache
+from config import (
+    ALEXA_DEVICE_RATE_PER_MINUTE,
+    ALEXA_DEVICE_BURST,
+    ALEXA_COMMUNITY_RATE_PER_MINUTE,
+    ALEXA_COMMUNITY_BURST,
+    RATE_LIMIT_MAX_TRACKED_KEYS,
+)
+
+
+# In-memory token buckets for /alexa/actions.
+# Every device gets its own bucket, and devices whose community is known (from the topology cache)
+# also draw from a shared community bucket. Checks are pure in-memory, no DB session is involved.
+
+class TokenBucketLimiter:
+    def __init__(self, rate_per_minute: float, burst: int, max_keys: int):
+        self.rate_per_second = rate_per_minute / 60
+        self.burst = burst
+        # key -> [tokens, last refill time]; least recently used keys are dropped (they come back full)
+        self._buckets = LRUCache(maxsize=max_keys)
+        self.throttled = 0
+
+    def allow(self, key) -> bool:
+        """Takes one token from the bucket for `key`, returns False if it is empty."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(self.burst), now]
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate_per_second)
+            bucket[1] = now
+        if bucket[0] < 1:
+            self.throttled += 1
+            return False
+        bucket[0] -= 1
+        return True
+
+    def tracked_keys(self) -> int:
+        return len(self._buckets)
+
+
+device_limiter = TokenBucketLimiter(ALEXA_DEVICE_RATE_PER_MINUTE, ALEXA_DEVICE_BURST, RATE_LIMIT_MAX_TRACKED_KEYS)
+community_limiter = TokenBucketLimiter(ALEXA_COMMUNITY_RATE_PER_MINUTE, ALEXA_COMMUNITY_BURST, RATE_LIMIT_MAX_TRACKED_KEYS)
+
+_stats = {"admitted": 0}
+
+
+def admit(device_id: Optional[str]) -> bool:
+    """Returns True if a request from `device_id` may proceed."""
+    if device_id:
+        if not device_limiter.allow(device_id):
+            return False
+        topology = device_cache.peek(device_id)
+        if topology is not None and not community_limiter.allow(topology.community_id):
+            return False
+    _stats["admitted"] += 1
+    return True
+
+
+def get_stats() -> dict:
+    return {
+        **_stats,
+        "throttled_device": device_limiter.throttled,
+        "throttled_community": community_limiter.throttled,
+        "tracked_devices": device_limiter.tracked_keys(),
+        "tracked_communities": community_limiter.tracked_keys(),
+    }
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+from config import CLASSIFIER_MODEL_PATH, CLASSIFIER_WORKERS
+
+logger = logging.getLogger(__name__)
+
+
+# In-process classifier that predicts the task type and emergency level of a help request.
+# The model bundle (see data_processing/train_local_classifier.py) is loaded once at startup and
+# scored on a small thread pool so predict() never blocks the event loop.
+# Requests are scored through services/inference_batcher.py, which groups concurrent utterances.
+# When no model file is present (or it fails to load) the classifier is disabled and tasks keep the default priority.
+
+class Prediction(NamedTuple):
+    task_type: str
+    emergency_level: int
+    priority_score: int  # Value written to Task.priority_score, higher is more urgent
+
+
+_bundle: Optional[dict] = None
+_executor: Optional[ThreadPoolExecutor] = None
+
+_stats = {"predictions": 0, "batches": 0, "_predict_seconds_total": 0.0}
+
+
+def load(path: str = CLASSIFIER_MODEL_PATH) -> bool:
+    """Loads the model bundle from disk. Returns False if there is no model to load."""
+    global _bundle
+    if not path or not os.path.exists(path):
+        return False
+    import joblib  # scikit-learn / joblib are only needed when a model is configured
+    _bundle = joblib.load(path)
+    return True
+
+
+def is_loaded() -> bool:
+    return _bundle is not None
+
+
+def is_running() -> bool:
+    """True once start() has loaded a model and the scoring pool is up."""
+    return _bundle is not None and _executor is not None
+
+
+def predict_batch(utterances: list) -> list:
+    """Scores many utterances with one vectorize / predict call per output (blocking)."""
+    features = _bundle['vectorizer'].transform(utterances)
+    task_types = _bundle['task_type_model'].predict(features)
+    emergency_levels = _bundle['emergency_model'].predict(features)
+    return [
+        Prediction(task_type=str(task_type), emergency_level=int(level), priority_score=int(level) + 1)
+        for task_type, level in zip(task_types, emergency_levels)
+    ]
+
+
+async def predict_batch_async(utterances: list) -> list:
+    """Runs predict_batch on the scoring thread pool."""
+
+    def timed_predict():
+        started = time.perf_counter()
+        predictions = predict_batch(utterances)
+        return time.perf_counter() - started, predictions
+
+    loop = asyncio.get_running_loop()
+    elapsed, predictions = await loop.run_in_executor(_executor, timed_predict)
+    # Counters are only touched here, on the event loop, never from the scoring threads
+    _stats["predictions"] += len(predictions)
+    _stats["batches"] += 1
+    _stats["_predict_seconds_total"] += elapsed
+    return predictions
+
+
+async def start():
+    global _executor
+    _executor = ThreadPoolExecutor(max_workers=CLASSIFIER_WORKERS, thread_name_prefix="classifier")
+    loop = asyncio.get_running_loop()
+    try:
+        loaded = await loop.run_in_executor(_executor, load)
+    except Exception:
+        # A broken model (or a missing scikit-learn) must not keep the app from starting
+        logger.exception("Request classifier disabled, could not load the model at '%s'", CLASSIFIER_MODEL_PATH)
+        return
+    if not loaded:
+        logger.warning("Request classifier disabled, no model at '%s'", CLASSIFIER_MODEL_PATH)
+
+
+async def stop():
+    global _executor
+    if _executor is not None:
+        executor, _executor = _executor, None  # score() stops submitting work right away
+        # Waits for in-flight predictions on a worker thread, not on the event loop
+        await asyncio.to_thread(executor.shutdown, wait=True)
+
+
+def get_stats() -> dict:
+    return {
+        "loaded": is_loaded(),
+        "predictions": _stats["predictions"],
+        "batches": _stats["batches"],
+        "avg_batch_ms": _stats["_predict_seconds_total"] / _stats["batches"] * 1000 if _stats["batches"] else 0.0,
+    }
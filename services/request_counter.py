@@ -0,0 +1,104 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+from database_configs.db import SessionLocal
+from crud.crud_alexa_device import increment_request_counters
+from config import DEVICE_COUNTER_FLUSH_INTERVAL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+# In-memory aggregator for AlexaDevice.total_number_requested / last_request.
+# Help intents only bump a dict entry; a periodic flusher writes all deltas in one batched UPDATE,
+# so the device rows are not updated (and locked) once per request.
+
+# AlexaDevice.id -> [number of requests since last flush, time of the latest request]
+_pending: dict = {}
+_flusher: Optional[asyncio.Task] = None
+_stop_requested: Optional[asyncio.Event] = None
+
+_stats = {"recorded": 0, "flushes": 0, "flushed_devices": 0, "failed_flushes": 0}
+
+# Max devices per UPDATE, keeps the statement well under the bind-parameter limit
+FLUSH_CHUNK_SIZE = 5000
+
+
+def record_request(alexa_device_id: int):
+    """Counts one request for the given AlexaDevice primary key."""
+    now = datetime.now(timezone.utc)
+    entry = _pending.get(alexa_device_id)
+    if entry is None:
+        _pending[alexa_device_id] = [1, now]
+    else:
+        entry[0] += 1
+        entry[1] = now
+    _stats["recorded"] += 1
+
+
+async def flush():
+    """Writes all pending counts to the database and returns the number of devices updated."""
+    global _pending
+    if not _pending:
+        return 0
+    # Swap the dict out so requests arriving during the UPDATE start a fresh batch
+    pending, _pending = _pending, {}
+    items = list(pending.items())
+    committed = 0  # Items whose chunk has been committed, each chunk commits on its own
+    try:
+        async with SessionLocal() as db:
+            for start in range(0, len(items), FLUSH_CHUNK_SIZE):
+                chunk = items[start:start + FLUSH_CHUNK_SIZE]
+                await increment_request_counters(db, {device_id: tuple(entry) for device_id, entry in chunk})
+                committed = start + len(chunk)
+    except Exception:
+        logger.exception("Error flushing request counters for %d devices", len(items) - committed)
+        _stats["failed_flushes"] += 1
+        return 0
+    finally:
+        # Only the chunks that did not commit are retried (also when the flush is cancelled)
+        _merge_back(dict(items[committed:]))
+    _stats["flushes"] += 1
+    _stats["flushed_devices"] += len(pending)
+    return len(pending)
+
+
+def _merge_back(pending: dict):
+    # Put counts from a failed flush back so they are retried with the next one
+    for device_id, (count, last_request) in pending.items():
+        entry = _pending.get(device_id)
+        if entry is None:
+            _pending[device_id] = [count, last_request]
+        else:
+            entry[0] += count
+            entry[1] = max(entry[1], last_request)
+
+
+async def _flush_periodically():
+    while not _stop_requested.is_set():
+        try:
+            await asyncio.wait_for(_stop_requested.wait(), timeout=DEVICE_COUNTER_FLUSH_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            await flush()
+
+
+async def start():
+    global _flusher, _stop_requested
+    if _flusher is None:
+        _stop_requested = asyncio.Event()
+        _flusher = asyncio.create_task(_flush_periodically())
+
+
+async def stop():
+    """Stops the periodic flusher and writes whatever is still pending."""
+    global _flusher
+    if _flusher is not None:
+        # Let a flush that is already running finish rather than cancelling it halfway
+        _stop_requested.set()
+        await _flusher
+        _flusher = None
+    await flush()
+
+
+def get_stats() -> dict:
+    return {**_stats, "pending_devices": len(_pending)}
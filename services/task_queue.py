@@ -0,0 +1,378 @@
+import asyncio
+import fcntl
+import glob
+import json
+import logging
+import os
+import re
+import time
+from contextlib import contextmanager
+from typing import Optional
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from database_configs.db import SessionLocal
+from crud.crud_task import create_tasks_bulk
+from config import (
+    TASK_QUEUE_ENABLED,
+    TASK_QUEUE_MAX_SIZE,
+    TASK_QUEUE_BATCH_SIZE,
+    TASK_QUEUE_FLUSH_INTERVAL_MS,
+    TASK_QUEUE_SHUTDOWN_TIMEOUT_SECONDS,
+    TASK_QUEUE_RETRY_DELAY_SECONDS,
+    TASK_QUEUE_JOURNAL_PATH,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Write-behind queue for Alexa tasks.
+# Handlers enqueue the column values of a Task and answer Alexa right away; a single background
+# consumer drains the queue and writes the tasks in batches (one commit per batch).
+# Items are (enqueued_at, seq, task_fields) tuples, enqueued_at comes from time.monotonic().
+#
+# Every accepted task is first appended to the journal ({"seq": n, "task": {...}} lines) and a
+# {"committed": [n, ...]} line is appended once its batch commits, so a crash or kill -9 loses
+# nothing. Delivery is at-least-once (a crash between a commit and its marker writes that batch
+# again). The journal is truncated whenever nothing is outstanding.
+#
+# Each worker process has its own journal, TASK_QUEUE_JOURNAL_PATH + ".<pid>", and holds an flock on
+# it while it runs. start() adopts the journals no running worker holds (a crashed or stopped worker's,
+# or the single TASK_QUEUE_JOURNAL_PATH file of older versions) under the TASK_QUEUE_JOURNAL_PATH +
+# ".lock" lock, so each left-behind task is written again by exactly one worker.
+#
+# A batch the database rejects (a deleted room or device, a bad value) is bisected until the rejected
+# rows are isolated; those are dead-lettered (logged with their values and dropped from the journal) and
+# the rest is written. A batch that fails because the database is unavailable goes back to the front
+# of the queue and is retried after TASK_QUEUE_RETRY_DELAY_SECONDS.
+
+_JOURNAL_SUFFIX = re.compile(r"\.\d+$")
+
+_queue: Optional[asyncio.Queue] = None
+_consumer: Optional[asyncio.Task] = None
+_stopping = False
+_retry = []  # Items written before anything newer: adopted from old journals, or put back after an outage
+
+_path = None  # This process's journal
+_journal = None  # Open append-mode file object, flock'ed while the queue runs
+_journal_lines = 0
+_next_seq = 0
+_unflushed = {}  # seq -> task_fields, journaled but not committed yet
+
+_stats = {
+    "enqueued": 0,
+    "committed": 0,
+    "retried": 0,  # Put back in the queue because the database was unavailable
+    "dead_lettered": 0,  # Rejected by the database on their own, logged and dropped
+    "rejected": 0,  # Queue full (or not running), caller inserted inline instead
+    "replayed": 0,  # Adopted from the journals of stopped workers
+    "batches": 0,
+    "last_batch_size": 0,
+    "max_depth": 0,
+    "last_commit_latency_ms": 0.0,
+    "max_commit_latency_ms": 0.0,
+    "_commit_latency_total_ms": 0.0,
+}
+
+
+def is_running() -> bool:
+    return _consumer is not None and not _consumer.done() and not _stopping
+
+
+def enqueue(task_fields: dict) -> bool:
+    """Queues a task for a batched insert. Returns False if the caller has to insert it itself."""
+    global _next_seq
+    if not is_running() or _queue.full():
+        # Backpressure: let the caller pay for the inline insert rather than dropping the task
+        _stats["rejected"] += 1
+        return False
+    try:
+        _next_seq += 1
+        _append_journal({"seq": _next_seq, "task": task_fields})
+    except OSError:
+        logger.exception("Could not journal a queued task, inserting it inline")
+        _stats["rejected"] += 1
+        return False
+    _unflushed[_next_seq] = task_fields
+    _queue.put_nowait((time.monotonic(), _next_seq, task_fields))
+    _stats["enqueued"] += 1
+    _stats["max_depth"] = max(_stats["max_depth"], _queue.qsize())
+    return True
+
+
+async def start():
+    """Starts the background consumer (no-op unless TASK_QUEUE_ENABLED and TASK_QUEUE_JOURNAL_PATH are set)."""
+    global _queue, _consumer, _stopping, _journal, _path
+    if not TASK_QUEUE_ENABLED or _consumer is not None:
+        return
+    if not TASK_QUEUE_JOURNAL_PATH:
+        logger.warning("TASK_QUEUE_ENABLED is set without TASK_QUEUE_JOURNAL_PATH, tasks are inserted inline")
+        return
+    _unflushed.clear()
+    _retry.clear()
+    _path = f"{TASK_QUEUE_JOURNAL_PATH}.{os.getpid()}"
+    with _journal_directory_lock():
+        adopted = _adopt_journals()
+        _journal = _open_journal()
+    if adopted:
+        logger.info("Adopted %d unwritten tasks from the journals of stopped workers", adopted)
+    _queue = asyncio.Queue(maxsize=TASK_QUEUE_MAX_SIZE)
+    _stopping = False
+    _consumer = asyncio.create_task(_consume())
+
+
+async def stop():
+    """Stops accepting tasks and flushes everything still queued before returning."""
+    global _consumer, _stopping, _journal
+    if _consumer is None:
+        return
+    _stopping = True
+    try:
+        _queue.put_nowait(None)  # Wake the consumer up if it is waiting on an empty queue
+    except asyncio.QueueFull:
+        pass  # The consumer is busy and will notice _stopping once the queue is drained
+
+    try:
+        # Shielded, so a timeout doesn't cancel the batch that is being written
+        await asyncio.wait_for(asyncio.shield(_consumer), timeout=TASK_QUEUE_SHUTDOWN_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        # The database is too slow to take the rest. Everything still queued is already in the
+        # journal; drop it from memory so the consumer exits after its current batch.
+        _drain_nowait()
+        _retry.clear()
+        logger.warning("Task queue shutdown timed out, %d tasks stay in the journal for the next start", len(_unflushed))
+    _consumer = None
+    with _journal_directory_lock():
+        if not _unflushed:
+            os.remove(_path)  # Nothing left for another worker to adopt
+        _journal.close()  # Releases the flock, the next worker to start adopts what is left
+    _journal = None
+
+
+async def _consume():
+    while not (_stopping and _queue.empty() and not _retry):
+        batch = await _collect_batch()
+        if batch and not await _write_batch(batch):
+            await asyncio.sleep(TASK_QUEUE_RETRY_DELAY_SECONDS)  # Give the database time to come back
+
+
+async def _collect_batch():
+    if _retry:
+        batch = _retry[:TASK_QUEUE_BATCH_SIZE]
+        del _retry[:len(batch)]
+        return batch
+    # Block for the first task, then keep filling the batch until it is full or the flush interval passes
+    first = await _queue.get()
+    batch = [first] if first is not None else []
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + TASK_QUEUE_FLUSH_INTERVAL_MS / 1000
+    while len(batch) < TASK_QUEUE_BATCH_SIZE and not _stopping:
+        timeout = deadline - loop.time()
+        if timeout <= 0:
+            break
+        try:
+            item = await asyncio.wait_for(_queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            break
+        if item is not None:
+            batch.append(item)
+    # While shutting down, take whatever is already queued without waiting
+    if _stopping:
+        batch.extend(_drain_nowait(TASK_QUEUE_BATCH_SIZE - len(batch)))
+    return batch
+
+
+def _drain_nowait(limit: Optional[int] = None):
+    items = []
+    while not _queue.empty() and (limit is None or len(items) < limit):
+        item = _queue.get_nowait()
+        if item is not None:
+            items.append(item)
+    return items
+
+
+async def _write_batch(batch) -> bool:
+    """Writes a batch, returns False if the database was unavailable (the unwritten rest is put back in front)."""
+    written, dead = [], []
+    available = True
+    try:
+        await _write_isolating(batch, written, dead)
+    except Exception:
+        done = {seq for _, seq, _ in written} | {item[1] for item, _ in dead}
+        unwritten = [item for item in batch if item[1] not in done]
+        logger.exception("Database unavailable, retrying %d queued tasks", len(unwritten))
+        _retry[:0] = unwritten
+        _stats["retried"] += len(unwritten)
+        available = False
+
+    for (_, _, task_fields), error in dead:
+        logger.error("Dropping a queued task the database rejects (%s): %s", _describe(error), json.dumps(task_fields))
+    _stats["dead_lettered"] += len(dead)
+    if written or dead:
+        _mark_committed([seq for _, seq, _ in written] + [item[1] for item, _ in dead])
+    if written:
+        latency_ms = (time.monotonic() - written[0][0]) * 1000  # Oldest task in the batch waited the longest
+        _stats["committed"] += len(written)
+        _stats["batches"] += 1
+        _stats["last_batch_size"] = len(written)
+        _stats["last_commit_latency_ms"] = latency_ms
+        _stats["max_commit_latency_ms"] = max(_stats["max_commit_latency_ms"], latency_ms)
+        _stats["_commit_latency_total_ms"] += latency_ms
+    return available
+
+
+async def _write_isolating(items, written: list, dead: list):
+    # Writes the items, splitting whatever the database rejects in halves until each rejected row is
+    # on its own (log2(batch size) extra round trips per bad row). Raises if the database is unavailable.
+    try:
+        async with SessionLocal() as db:
+            await create_tasks_bulk(db, [task_fields for _, _, task_fields in items])
+    except Exception as error:
+        if _is_unavailable(error):
+            raise
+        if len(items) == 1:
+            dead.append((items[0], error))
+            return
+        middle = len(items) // 2
+        await _write_isolating(items[:middle], written, dead)
+        await _write_isolating(items[middle:], written, dead)
+        return
+    written.extend(items)
+
+
+def _is_unavailable(error: Exception) -> bool:
+    # The database or the connection to it failed, as opposed to the database rejecting the rows
+    if isinstance(error, DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(error, (OperationalError, InterfaceError, OSError, asyncio.TimeoutError))
+
+
+def _describe(error: Exception) -> str:
+    return str(getattr(error, "orig", None) or error).splitlines()[0]
+
+
+def _append_journal(record: dict):
+    # write + flush hands the line to the OS, so it survives the process being killed
+    global _journal_lines
+    _journal.write(json.dumps(record) + "\n")
+    _journal.flush()
+    _journal_lines += 1
+
+
+def _mark_committed(seqs):
+    global _journal_lines
+    for seq in seqs:
+        _unflushed.pop(seq, None)
+    if _journal is None:
+        return
+    try:
+        if not _unflushed:
+            _journal.truncate(0)  # Nothing outstanding, start the journal over
+            _journal_lines = 0
+        elif _journal_lines > 2 * TASK_QUEUE_MAX_SIZE:
+            _rewrite_journal()  # Tasks waiting for a retry keep it from emptying, drop the committed lines
+        else:
+            _append_journal({"committed": seqs})
+    except OSError:
+        logger.exception("Could not mark %d tasks as committed in the journal", len(seqs))
+
+
+@contextmanager
+def _journal_directory_lock():
+    # Held while adopting journals and while replacing one, so no worker reads a journal that another
+    # worker is adopting or that is briefly unlocked while it is replaced
+    with open(TASK_QUEUE_JOURNAL_PATH + ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield  # Closing the file releases the lock
+
+
+def _open_journal():
+    journal = open(_path, "a")
+    fcntl.flock(journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    return journal
+
+
+def _rewrite_journal():
+    global _journal
+    with _journal_directory_lock():
+        _journal.close()
+        _write_journal_file()
+        _journal = _open_journal()
+
+
+def _write_journal_file():
+    # Atomically replaces the journal with just the outstanding tasks
+    global _journal_lines
+    temporary_path = _path + ".tmp"
+    with open(temporary_path, "w") as journal:
+        for seq, task_fields in _unflushed.items():
+            journal.write(json.dumps({"seq": seq, "task": task_fields}) + "\n")
+    os.replace(temporary_path, _path)
+    _journal_lines = len(_unflushed)
+
+
+def _adopt_journals() -> int:
+    # Takes over the journals no running worker holds a lock on (called under the directory lock):
+    # their uncommitted tasks are written to this process's journal first, queued in front of new
+    # tasks, and only then are the old files removed.
+    global _next_seq
+    paths = [path for path in glob.glob(glob.escape(TASK_QUEUE_JOURNAL_PATH) + ".*") if _JOURNAL_SUFFIX.search(path)]
+    if os.path.exists(TASK_QUEUE_JOURNAL_PATH):
+        paths.append(TASK_QUEUE_JOURNAL_PATH)  # Single journal written before there was one per worker
+    orphans = []
+    for path in paths:
+        journal = open(path)
+        try:
+            fcntl.flock(journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            journal.close()  # Its worker is running
+            continue
+        orphans.append((path, journal))
+
+    enqueued_at = time.monotonic()
+    for path, journal in orphans:
+        for task_fields in _read_journal(journal):
+            _next_seq += 1
+            _unflushed[_next_seq] = task_fields
+            _retry.append((enqueued_at, _next_seq, task_fields))
+    _write_journal_file()
+    for path, journal in orphans:
+        if path != _path:  # A journal under this pid was left by a stopped process that had the same pid
+            os.remove(path)
+        journal.close()
+    _stats["replayed"] += len(_retry)
+    return len(_retry)
+
+
+def _read_journal(journal) -> list:
+    # Tasks that were journaled but never marked committed, in enqueue order.
+    # Plain task dicts (journals written before the seq / committed records) count as uncommitted.
+    pending = {}
+    for number, line in enumerate(journal):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            logger.warning("Skipping unreadable line %d of %s", number + 1, journal.name)  # Torn last write
+            continue
+        if "committed" in record:
+            for seq in record["committed"]:
+                pending.pop(seq, None)
+        elif "task" in record:
+            pending[record["seq"]] = record["task"]
+        else:
+            pending[("legacy", number)] = record
+    return list(pending.values())
+
+
+def get_stats() -> dict:
+    stats = {key: value for key, value in _stats.items() if not key.startswith("_")}
+    stats["running"] = is_running()
+    stats["depth"] = _queue.qsize() if _queue is not None else 0
+    stats["max_size"] = TASK_QUEUE_MAX_SIZE
+    stats["unflushed"] = len(_unflushed)
+    stats["retry_depth"] = len(_retry)
+    stats["journal_lines"] = _journal_lines
+    stats["avg_commit_latency_ms"] = (
+        _stats["_commit_latency_total_ms"] / _stats["batches"] if _stats["batches"] else 0.0
+    )
+    return stats
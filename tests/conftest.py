@@ -0,0 +1,19 @@
+import os
+import sys
+import tempfile
+
+# The app reads its settings at import time, so the scratch database and test settings are set up
+# here, before any test module imports it.
+_scratch = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+_scratch.close()
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_scratch.name}"
+os.environ.setdefault("SECRET_KEY", "tests")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pytest_unconfigure(config):
+    if os.path.exists(_scratch.name):
+        os.remove(_scratch.name)
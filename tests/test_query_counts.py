@@ -0,0 +1,137 @@
+"""
+SQL statements per endpoint.
+
+Seeds the scratch database (one community with rooms, Alexa devices, care staff and tasks), calls
+each API route once through the ASGI app in-process and asserts the exact number of SQL statements
+it emits. A relationship that silently starts loading eagerly (or lazily, per row), an N+1 in a
+response model or a dropped loader option changes a count and fails the test, whichever way it moves.
+
+The caller's principal is cached before counting, so the numbers are the route's own statements.
+Counts are for the SQLite scratch database the tests run on (see conftest.py).
+
+Run from the repository root (after pip install -r requirements-dev.txt):
+    python -m pytest tests/test_query_counts.py
+"""
+import asyncio
+
+
+ROOM_COUNT = 20
+STAFF_COUNT = 15
+TASK_COUNT = 200
+PASSWORD = "Bench-Passw0rd!"
+
+# (method, path, json body, SQL statements). {community_id}, {room_id}, {user_id}, {staff_id} and the
+# {spare_*} ids are filled in after seeding. Routes run in this order, so writes come after the reads
+# they would affect and POST /communities (which moves the caller into the new community) comes last.
+EXPECTED = [
+    ("GET", "/api/users/", None, 1),
+    ("GET", "/api/users/{user_id}", None, 1),
+    ("GET", "/api/communities/", None, 1),
+    ("GET", "/api/communities/{community_id}", None, 1),
+    ("GET", "/api/community/manager", None, 1),
+    ("GET", "/api/care_staff/", None, 1),  # users LEFT JOIN communities
+    ("GET", "/api/care_staff/{staff_id}", None, 2),  # + selectinload(User.community)
+    ("GET", "/api/communities/{community_id}/care_staff/", None, 1),
+    ("GET", "/api/my-community/care_staff/", None, 1),
+    ("GET", "/api/rooms/{room_id}", None, 2),  # + selectinload(Room.alexa_devices)
+    ("GET", "/api/communities/{community_id}/rooms", None, 2),  # rooms + the community's devices
+    ("GET", "/api/my-community/rooms", None, 2),  # + alexa_devices
+    ("GET", "/api/rooms/{room_id}/alexa-status", None, 1),  # EXISTS subquery
+    ("GET", "/api/tasks/", None, 1),
+    ("GET", "/api/tasks/?status=pending&order_by=priority", None, 1),
+    ("GET", "/api/tasks/?limit=1000", None, 1),  # Over MAX_PAGE_SIZE is clamped, not rejected
+    ("GET", "/api/tasks/export", None, 1),  # One streamed SELECT however many tasks there are
+    ("GET", "/api/tasks/export?format=csv", None, 1),
+    ("GET", "/api/alexa-devices/", None, 1),
+    ("GET", "/api/communities/{community_id}/alexa-devices/", None, 1),
+    ("POST", "/api/rooms/", {"room_number": "999"}, 2),  # INSERT, refresh (a new room has no devices)
+    ("POST", "/api/rooms/import", [{"room_number": "100", "floor_number": 1}, {"room_number": "997"}], 2),  # Existing rooms (no xmax on SQLite), upsert
+    ("PUT", "/api/rooms/{room_id}", {"room_number": "998"}, 5),  # ownership check + devices, UPDATE, refresh + devices
+    ("DELETE", "/api/rooms/{spare_room_id}", None, 4),  # load, devices + tasks (the unit of work nulls their FKs), DELETE
+    ("POST", "/api/care_staff/", {"name": "New Staff", "email": "new.staff@example.com", "password": "Staff-Passw0rd!"}, 3),  # INSERT, reload + community
+    ("PUT", "/api/care_staff/{staff_id}", {"name": "Renamed Staff"}, 5),  # load + community, UPDATE, reload + community
+    ("DELETE", "/api/care_staff/{spare_staff_id}", None, 9),  # load + community, one SELECT per child relationship, DELETE
+    ("POST", "/api/users/", {"name": "New User", "email": "new.user@example.com", "password": "User@Passw0rd!", "role": "resident"}, 3),  # email check, INSERT, refresh
+    ("DELETE", "/api/users/{spare_user_id}", None, 8),  # load, one SELECT per child relationship, DELETE
+    ("POST", "/api/communities/", {"name": "Second Community", "address": "2 Budget St"}, 6),  # PIN check, INSERT, reload, load + UPDATE creator, refresh
+]
+
+
+async def seed(session_factory):
+    from models.models import User, Community, Room, AlexaDevice, Task
+    from auth.utils import get_password_hash
+
+    async with session_factory() as db:
+        manager = User(name="Budget Manager", email="budget@example.com", role="manager",
+                       hashed_password=get_password_hash(PASSWORD))
+        spare_user = User(name="Spare User", email="spare.user@example.com", role="resident", hashed_password="x")
+        db.add_all([manager, spare_user])
+        await db.flush()
+        community = Community(name="Budget Community", address="1 Budget St", created_by_id=manager.id, pin_code="BDGT1")
+        db.add(community)
+        await db.flush()
+        manager.community_id = community.id
+        rooms = [Room(room_number=str(100 + i), community_id=community.id) for i in range(ROOM_COUNT)]
+        spare_room = Room(room_number="spare", community_id=community.id)  # No devices or tasks, safe to delete
+        staff = [
+            User(name=f"Staff {i}", email=f"staff{i}@example.com", role="care_staff", hashed_password="x", community_id=community.id)
+            for i in range(STAFF_COUNT + 1)
+        ]
+        db.add_all(rooms + staff + [spare_room])
+        await db.flush()
+        devices = [AlexaDevice(device_id=f"amzn1.ask.device.budget-{i}", room_id=room.id, community_id=community.id)
+                   for i, room in enumerate(rooms)]
+        db.add_all(devices)
+        await db.flush()
+        db.add_all([
+            Task(title="Budget task", status="pending" if i % 3 else "completed", priority_score=i % 4 + 1,
+                 community_id=community.id, room_id=rooms[i % ROOM_COUNT].id, alexa_device_id=devices[i % ROOM_COUNT].id)
+            for i in range(TASK_COUNT)
+        ])
+        ids = {
+            "community_id": community.id, "room_id": rooms[0].id, "user_id": manager.id, "staff_id": staff[0].id,
+            "spare_room_id": spare_room.id, "spare_staff_id": staff[-1].id, "spare_user_id": spare_user.id,
+        }
+        await db.commit()
+        return ids
+
+
+async def count_statements():
+    import httpx
+    from sqlalchemy import event
+    from database_configs import db as database
+    from database_configs.db import Base
+    from main import app
+
+    statements = {"count": 0}
+
+    @event.listens_for(database.engine.sync_engine, "before_cursor_execute")
+    def count_statement(*_):
+        statements["count"] += 1
+
+    counts = {}
+    try:
+        async with database.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.drop_all)
+            await connection.run_sync(Base.metadata.create_all)
+        ids = await seed(database.SessionLocal)
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://budget") as client:
+            login = await client.post("/api/login", json={"email": "budget@example.com", "password": PASSWORD})
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+            await client.get("/api/users/", headers=headers)  # Caches the principal
+
+            for method, path, body, _ in EXPECTED:
+                before = statements["count"]
+                response = await client.request(method, path.format(**ids), json=body, headers=headers)
+                assert response.status_code < 400, f"{method} {path} returned {response.status_code}: {response.text}"
+                counts[f"{method} {path}"] = statements["count"] - before
+    finally:
+        event.remove(database.engine.sync_engine, "before_cursor_execute", count_statement)
+        await database.engine.dispose()
+    return counts
+
+
+def test_sql_statements_per_route():
+    counts = asyncio.run(count_statements())
+    assert counts == {f"{method} {path}": expected for method, path, _, expected in EXPECTED}
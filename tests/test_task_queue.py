@@ -0,0 +1,233 @@
+"""
+Write-behind task queue: journal, replay and failure handling.
+
+Runs the queue against the scratch database (see conftest.py) with the settings patched per test: a
+journal in pytest's tmp_path, a short flush interval, retry delay and shutdown timeout. Database
+outages and slow commits are simulated by replacing create_tasks_bulk; rejected rows are real (a task
+for a room that does not exist, with SQLite's foreign key checks turned on).
+
+Run from the repository root (after pip install -r requirements-dev.txt):
+    python -m pytest tests/test_task_queue.py
+"""
+import asyncio
+import fcntl
+import json
+import os
+
+import pytest
+
+
+def run(coroutine_function):
+    from database_configs import db as database
+    from database_configs.db import Base
+
+    async def main():
+        try:
+            async with database.engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+            return await coroutine_function()
+        finally:
+            await database.engine.dispose()  # Pooled connections belong to this event loop
+    return asyncio.run(main())
+
+
+async def wait_until(predicate, timeout=2.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, "timed out waiting for the task queue"
+        await asyncio.sleep(0.01)
+
+
+async def task_count(title):
+    from sqlalchemy import func, select
+    from database_configs.db import SessionLocal
+    from models.models import Task
+
+    async with SessionLocal() as db:
+        return await db.scalar(select(func.count()).select_from(Task).where(Task.title == title))
+
+
+def task(title, room_id=None):
+    from crud.crud_task import build_task_fields
+    return build_task_fields(title, alexa_device_id=None, community_id=None, room_id=room_id)
+
+
+def read_journal(path):
+    from services import task_queue
+    with open(path) as journal:
+        return task_queue._read_journal(journal)
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    from services import task_queue
+
+    monkeypatch.setattr(task_queue, "TASK_QUEUE_ENABLED", True)
+    monkeypatch.setattr(task_queue, "TASK_QUEUE_JOURNAL_PATH", str(tmp_path / "tasks.journal"))
+    monkeypatch.setattr(task_queue, "TASK_QUEUE_FLUSH_INTERVAL_MS", 5)
+    monkeypatch.setattr(task_queue, "TASK_QUEUE_RETRY_DELAY_SECONDS", 0.01)
+    monkeypatch.setattr(task_queue, "TASK_QUEUE_SHUTDOWN_TIMEOUT_SECONDS", 0.2)
+    for key, value in task_queue._stats.items():
+        task_queue._stats[key] = type(value)()
+    yield task_queue
+    if task_queue._journal is not None:  # A test failed with the queue running
+        task_queue._journal.close()
+    task_queue._consumer = task_queue._journal = None
+
+
+def test_replay_after_unclean_stop(queue, tmp_path):
+    # A worker killed with one of its three tasks committed: the other two are written by the next start
+    orphan = tmp_path / "tasks.journal.424242"
+    orphan.write_text("".join(json.dumps(record) + "\n" for record in [
+        {"seq": 1, "task": task("replay-committed")},
+        {"seq": 2, "task": task("replay-pending")},
+        {"seq": 3, "task": task("replay-pending")},
+        {"committed": [1]},
+    ]) + '{"seq": 4, "ta')  # Torn last write
+
+    async def scenario():
+        await queue.start()
+        assert queue.get_stats()["replayed"] == 2
+        assert not orphan.exists()
+        assert len(read_journal(queue._path)) == 2  # Adopted into this worker's journal before the orphan was removed
+        await wait_until(lambda: queue.get_stats()["unflushed"] == 0)
+        await queue.stop()
+        return await task_count("replay-pending"), await task_count("replay-committed")
+
+    assert run(scenario) == (2, 0)
+    assert not (tmp_path / f"tasks.journal.{os.getpid()}").exists()  # Removed on a stop with nothing outstanding
+
+
+def test_journal_of_running_worker_is_not_adopted(queue, tmp_path):
+    other = tmp_path / "tasks.journal.434343"
+    other.write_text(json.dumps({"seq": 1, "task": task("other-worker")}) + "\n")
+
+    async def scenario():
+        with open(other) as held:
+            fcntl.flock(held, fcntl.LOCK_EX | fcntl.LOCK_NB)  # What the other worker holds while it runs
+            await queue.start()
+            await queue.stop()
+        return await task_count("other-worker")
+
+    assert run(scenario) == 0
+    assert queue.get_stats()["replayed"] == 0
+    assert len(read_journal(other)) == 1
+
+
+def test_rejected_row_is_dead_lettered(queue):
+    from sqlalchemy import event
+    from database_configs import db as database
+
+    def enforce_foreign_keys(connection, _):
+        connection.execute("PRAGMA foreign_keys=ON")
+
+    async def scenario():
+        await queue.start()
+        for title in ["poison-ok", "poison-ok", "poison-bad", "poison-ok", "poison-ok"]:
+            assert queue.enqueue(task(title, room_id=999999 if title == "poison-bad" else None))  # A deleted room
+        await wait_until(lambda: queue.get_stats()["unflushed"] == 0)
+        await queue.stop()
+        return await task_count("poison-ok"), await task_count("poison-bad")
+
+    event.listen(database.engine.sync_engine, "connect", enforce_foreign_keys)
+    try:
+        assert run(scenario) == (4, 0)
+    finally:
+        event.remove(database.engine.sync_engine, "connect", enforce_foreign_keys)
+    stats = queue.get_stats()
+    assert (stats["committed"], stats["dead_lettered"], stats["retried"]) == (4, 1, 0)
+
+
+def test_failed_batch_is_kept_and_retried(queue, monkeypatch):
+    from sqlalchemy.exc import OperationalError
+    insert = queue.create_tasks_bulk
+    outage = {"calls": 0}
+
+    async def create_tasks_bulk(db, tasks):
+        outage["calls"] += 1
+        if outage["calls"] <= 3:
+            raise OperationalError("INSERT INTO tasks", {}, ConnectionRefusedError("database is down"))
+        return await insert(db, tasks)
+
+    monkeypatch.setattr(queue, "create_tasks_bulk", create_tasks_bulk)
+
+    async def scenario():
+        await queue.start()
+        for _ in range(3):
+            queue.enqueue(task("outage"))
+        await wait_until(lambda: outage["calls"] >= 1)
+        assert len(read_journal(queue._path)) == 3  # Still journaled while the database is down
+        await wait_until(lambda: queue.get_stats()["unflushed"] == 0)
+        await queue.stop()
+        return await task_count("outage")
+
+    assert run(scenario) == 3
+    stats = queue.get_stats()
+    assert stats["committed"] == 3
+    assert stats["retried"] >= 3
+    assert stats["dead_lettered"] == 0
+
+
+def test_journal_truncation_and_rewrite(queue, tmp_path, monkeypatch):
+    monkeypatch.setattr(queue, "TASK_QUEUE_MAX_SIZE", 2)  # Rewritten past 2 * 2 lines
+    queue._path = str(tmp_path / "tasks.journal.1")
+    queue._unflushed.clear()
+    queue._journal = queue._open_journal()
+    queue._journal_lines = 0
+    try:
+        for seq in range(1, 6):
+            queue._unflushed[seq] = task(f"journal-{seq}")
+            queue._append_journal({"seq": seq, "task": queue._unflushed[seq]})
+
+        queue._mark_committed([1])  # 5 lines: rewritten with only the outstanding tasks
+        with open(queue._path) as journal:
+            assert [json.loads(line)["seq"] for line in journal] == [2, 3, 4, 5]
+        assert queue._journal_lines == 4
+
+        queue._mark_committed([2])  # 4 lines: a committed marker is appended
+        assert queue._journal_lines == 5
+        assert [fields["title"] for fields in read_journal(queue._path)] == ["journal-3", "journal-4", "journal-5"]
+
+        queue._mark_committed([3, 4, 5])  # Nothing outstanding: truncated
+        assert queue._journal_lines == 0
+        with open(queue._path) as journal:
+            assert journal.read() == ""
+    finally:
+        queue._journal.close()
+        queue._journal = None
+
+
+def test_stop_timeout_leaves_tasks_for_the_next_start(queue, monkeypatch):
+    insert = queue.create_tasks_bulk
+    database_ready = None
+
+    async def create_tasks_bulk(db, tasks):
+        await database_ready.wait()  # A commit that outlasts the shutdown timeout
+        return await insert(db, tasks)
+
+    monkeypatch.setattr(queue, "create_tasks_bulk", create_tasks_bulk)
+
+    async def scenario():
+        nonlocal database_ready
+        database_ready = asyncio.Event()
+        await queue.start()
+        for _ in range(3):
+            queue.enqueue(task("slow-commit"))
+        consumer = queue._consumer
+        await queue.stop()  # Returns after TASK_QUEUE_SHUTDOWN_TIMEOUT_SECONDS, with the batch still in flight
+        path = queue._path
+        assert len(read_journal(path)) == 3
+        assert not consumer.done()
+
+        monkeypatch.setattr(queue, "create_tasks_bulk", insert)
+        await queue.start()  # A new start (any worker) adopts the journal the stopped one left
+        assert queue.get_stats()["replayed"] == 3
+        await wait_until(lambda: queue.get_stats()["unflushed"] == 0)
+        await queue.stop()
+
+        database_ready.set()
+        await consumer  # The shielded batch finishes on its own: at-least-once, so these are written twice
+        return await task_count("slow-commit")
+
+    assert run(scenario) == 6